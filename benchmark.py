@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+
+""" time the stages of drawing a synthetic corpus of examples, compare with earlier results """
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import typing
+from tagging import Tags
+import settings
+import drawing
+from diagnostics import Diagnostics
+
+# version of the result format, increase on incompatible changes
+RESULT_VERSION = 1
+
+STAGES = ["load_tags", "add_group", "draw", "save", "get_html"]
+
+
+class CorpusMix(typing.NamedTuple):
+    """ share of the kinds of ways in a synthetic corpus """
+    lane_weights: typing.Tuple[float, ...] = (1, 4, 1, 1)  # roads with 1, 2, 3, 4 lanes
+    cycle_lane_share: float = 0.5  # roads with cycleway:right=lane
+    exclusive_share: float = 0.5  # of these, cycleway:right:lane=exclusive instead of advisory
+    path_share: float = 0.3  # examples with a path next to the road
+    segregated_share: float = 0.5  # of these, segregated=yes
+    sign_density: float = 0.5  # chance of a traffic sign on cycleways and paths
+
+
+SIGNS = ["DE:237", "DE:237;1000-31", "DE:239;1022-10", "DE:240", "DE:241-30"]
+
+
+def make_road(rng: random.Random, mix: CorpusMix) -> typing.Dict[str, str]:
+    tags = {
+        "highway": "road",
+        "lanes": str(rng.choices(range(1, len(mix.lane_weights) + 1), mix.lane_weights)[0]),
+        "divider": rng.choice(["dashed_line", "solid_line", "no"]),
+    }
+    if rng.random() < mix.cycle_lane_share:
+        tags["cycleway:right"] = "lane"
+        tags["cycleway:right:lane"] = "exclusive" if rng.random() < mix.exclusive_share else "advisory"
+    return tags
+
+
+def make_example(rng: random.Random, mix: CorpusMix, number: int) -> typing.Dict:
+    ways = [{"name": "Straße", "direction": "up", "tags": make_road(rng, mix)}]
+    if rng.random() < mix.path_share:
+        tags = {"highway": "path", "segregated": "yes" if rng.random() < mix.segregated_share else "no"}
+        name = "Weg"
+    else:
+        tags = {"highway": rng.choice(["cycleway", "footway"])}
+        name = "Radweg" if tags["highway"] == "cycleway" else "Gehweg"
+    if tags["highway"] != "footway" and rng.random() < mix.sign_density:
+        tags["traffic_sign"] = rng.choice(SIGNS)
+    ways.append({"name": name, "direction": "up", "tags": tags})
+    return {"sort_weight": number, "ways": ways}
+
+
+def generate_corpus(directory: str, examples: int, files: int = 1, mix: CorpusMix = CorpusMix(), seed: int = 0) -> None:
+    """ write examples split into files tags files to directory, equal seeds give equal corpora """
+    rng = random.Random(seed)
+    corpus = [{} for _ in range(files)]
+    for number in range(examples):
+        corpus[number % files]["bench_" + str(number)] = make_example(rng, mix, number)
+    for file_number, file_data in enumerate(corpus):
+        with open(os.path.join(directory, "bench_" + str(file_number) + ".json"), "w") as outfile:
+            json.dump(file_data, outfile, indent=4, ensure_ascii=False)
+
+
+def run_stages(tags_directory: str, svg_directory: str) -> typing.Dict[str, float]:
+    """ draw every example of tags_directory once, return seconds spent per stage """
+    times = dict.fromkeys(STAGES, 0.0)
+
+    start = time.perf_counter()
+    tags = Tags(tags_directory)
+    times["load_tags"] += time.perf_counter() - start
+
+    for example in tags:
+        d_file = drawing.Drawing()
+
+        start = time.perf_counter()
+        d_file.add_group(example)
+        times["add_group"] += time.perf_counter() - start
+
+        d_file.file_name = os.path.join(svg_directory, os.path.basename(d_file.file_name))
+
+        start = time.perf_counter()
+        d_file.draw()
+        times["draw"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        d_file.save()
+        times["save"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        d_file.get_html()
+        times["get_html"] += time.perf_counter() - start
+    return times
+
+
+def benchmark(examples: int, files: int, mix: CorpusMix, seed: int, repeat: int) -> typing.Dict:
+    """ fastest time per stage of repeat runs over the same corpus """
+    with tempfile.TemporaryDirectory() as tags_directory, tempfile.TemporaryDirectory() as svg_directory:
+        generate_corpus(tags_directory, examples, files, mix, seed)
+        runs = [run_stages(tags_directory, svg_directory) for _ in range(repeat)]
+
+    stages = {}
+    for stage in STAGES:
+        seconds = min(run[stage] for run in runs)
+        stages[stage] = {"seconds": seconds, "us_per_example": seconds / examples * 1e6}
+    return {
+        "version": RESULT_VERSION,
+        # as read back from json, to compare with earlier results
+        "corpus": json.loads(json.dumps({"examples": examples, "files": files, "seed": seed, "mix": mix._asdict()})),
+        "repeat": repeat,
+        "python": sys.version.split()[0],
+        "stages": stages,
+        "total_seconds": sum(stage["seconds"] for stage in stages.values()),
+    }
+
+
+def compare(result: typing.Dict, baseline: typing.Dict, tolerance: float) -> typing.List[str]:
+    """ stages which are slower than baseline by more than tolerance, e.g. 0.2 for 20% """
+    if baseline.get("version") != result["version"] or baseline.get("corpus") != result["corpus"]:
+        return ["baseline was measured with a different result version or corpus"]
+    regressions = []
+    for stage in STAGES:
+        old = baseline["stages"][stage]["seconds"]
+        new = result["stages"][stage]["seconds"]
+        if new > old * (1 + tolerance):
+            regressions.append(stage + ": " + "{:.3f}s -> {:.3f}s".format(old, new))
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--examples", type=int, default=500, help="number of examples in the corpus (default: 500)")
+    parser.add_argument("--files", type=int, default=4, help="number of tags files the corpus is split into (default: 4)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the corpus generator (default: 0)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs over the corpus, the fastest counts (default: 3)")
+    defaults = CorpusMix()
+    parser.add_argument("--lane-weights", type=float, nargs="+", default=defaults.lane_weights, help="relative share of roads with 1, 2, 3, ... lanes")
+    parser.add_argument("--cycle-lane-share", type=float, default=defaults.cycle_lane_share)
+    parser.add_argument("--exclusive-share", type=float, default=defaults.exclusive_share)
+    parser.add_argument("--path-share", type=float, default=defaults.path_share)
+    parser.add_argument("--segregated-share", type=float, default=defaults.segregated_share)
+    parser.add_argument("--sign-density", type=float, default=defaults.sign_density)
+    parser.add_argument("-o", "--output", help="write results as json to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="fail if a stage is slower than in this earlier result")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown per stage for --compare (default: 0.2)")
+    args = parser.parse_args()
+
+    Diagnostics.verbosity = Diagnostics.QUIET
+    settings.Draw.init()
+    mix = CorpusMix(tuple(args.lane_weights), args.cycle_lane_share, args.exclusive_share, args.path_share, args.segregated_share, args.sign_density)
+    result = benchmark(args.examples, args.files, mix, args.seed, args.repeat)
+
+    for stage in STAGES:
+        print(stage.ljust(10), "{:8.3f}s {:10.1f}us/example".format(result["stages"][stage]["seconds"], result["stages"][stage]["us_per_example"]))
+    print("total".ljust(10), "{:8.3f}s".format(result["total_seconds"]))
+
+    if args.output is not None:
+        with open(args.output, "w") as outfile:
+            json.dump(result, outfile, indent=4, sort_keys=True)
+
+    if args.compare is not None:
+        with open(args.compare) as infile:
+            regressions = compare(result, json.load(infile), args.tolerance)
+        for regression in regressions:
+            print("regression:", regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+# pylint: disable=missing-module-docstring
+
+import typing
+import json
+import os
+import hashlib
+import settings
+import tagging
+from drawing import Drawing
+
+
+class BuildCache:
+    """ persistent manifest of drawn examples, used to skip examples whose inputs did not change """
+
+    file_name: str
+    entries: typing.Dict[str, typing.Dict]
+
+    def __init__(self: 'BuildCache', file_name: str = "build_manifest.json", load: bool = True, scales: typing.Optional[typing.List[float]] = None, dedupe: bool = False) -> 'BuildCache':
+        # drawings of other scales than those of the last run are drawn again,
+        # as are drawings of the other mode, shared drawings of --dedupe are named after their profile and unlabelled
+        self.file_name = file_name
+        self.scales = scales
+        self.dedupe = dedupe
+        self.entries = {}
+        self.old_entries: typing.Dict[str, typing.Dict] = {}
+        self.file_hashes: typing.Dict[str, typing.Optional[str]] = {}
+        if load and os.path.exists(self.file_name):
+            with open(self.file_name) as json_file:
+                self.old_entries = json.load(json_file).get("examples", {})
+
+    @staticmethod
+    def hash_data(data) -> str:
+        return hashlib.sha256(json.dumps(data, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def example_hash(example: tagging.Example) -> str:
+        """ hash of everything in an example which changes its drawing """
+        return BuildCache.hash_data([example.name, [[way.name, way.direction, way] for way in example]])
+
+    @staticmethod
+    def settings_hash(keys: typing.List[str]) -> str:
+        """ hash of the resolved values of the given top level draw settings """
+        compiled = settings.Draw.compiled()
+        return BuildCache.hash_data({key: repr(getattr(compiled, key, None)) for key in keys})
+
+    def file_hash(self: 'BuildCache', path: str) -> typing.Optional[str]:
+        if path not in self.file_hashes:
+            if os.path.exists(path):
+                with open(path, "rb") as infile:
+                    self.file_hashes[path] = hashlib.sha256(infile.read()).hexdigest()
+            else:
+                self.file_hashes[path] = None
+        return self.file_hashes[path]
+
+    @staticmethod
+    def get_files(entry: typing.Dict) -> typing.List[str]:
+        """ svg files of an entry, with scales one per scale, its file_name is the one of the first scale """
+        if not entry.get("scales"):
+            return [entry["file_name"]]
+        # e.g. svg/strasse2.svg for svg/40/strasse2.svg
+        file_name = os.path.join(os.path.dirname(os.path.dirname(entry["file_name"])), os.path.basename(entry["file_name"]))
+        return [Drawing.get_scaled_file_name(file_name, scale) for scale in entry["scales"]]
+
+    def lookup(self: 'BuildCache', example: tagging.Example) -> typing.Optional[str]:
+        """ return the html table cells of the tags of example, if its svg file is up to date, otherwise None """
+        entry = self.old_entries.get(example.name)
+        if entry is None or "tags_html" not in entry:
+            # entries of manifests with whole rows are drawn again
+            return None
+        if entry["example"] != BuildCache.example_hash(example):
+            return None
+        if entry.get("scales") != self.scales:
+            return None
+        if entry.get("dedupe", False) != self.dedupe:
+            return None
+        if entry["settings"] != BuildCache.settings_hash(entry["settings_keys"]):
+            return None
+        for path, asset_hash in entry["assets"].items():
+            if self.file_hash(path) != asset_hash:
+                return None
+        if not all(os.path.exists(file_name) for file_name in BuildCache.get_files(entry)):
+            return None
+
+        # still up to date, keep for the next run
+        self.entries[example.name] = entry
+        return entry["tags_html"]
+
+    def store(self: 'BuildCache', example: tagging.Example, file_name: str, tags_html: str, settings_keys: typing.List[str], assets: typing.List[str]) -> None:
+        """ remember the inputs of a freshly drawn example """
+        self.entries[example.name] = {
+            "example": BuildCache.example_hash(example),
+            "settings_keys": settings_keys,
+            "settings": BuildCache.settings_hash(settings_keys),
+            "assets": {path: self.file_hash(path) for path in sorted(set(assets))},
+            "file_name": file_name,
+            "tags_html": tags_html,
+            "scales": self.scales,
+            "dedupe": self.dedupe,
+        }
+
+    def save(self: 'BuildCache', names: typing.Optional[typing.Set[str]] = None) -> None:
+        """ write manifest, the examples of this run replace their loaded entries, entries of other examples are kept,
+        e.g. of examples not selected, with names only those of examples in names, e.g. not of examples removed from tags/ """
+        entries = {name: entry for name, entry in self.old_entries.items() if names is None or name in names}
+        entries.update(self.entries)
+        with open(self.file_name, "w") as outfile:
+            json.dump({"examples": entries}, outfile, sort_keys=True, indent=4, ensure_ascii=False)
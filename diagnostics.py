@@ -0,0 +1,91 @@
+# pylint: disable=missing-module-docstring
+
+import typing
+import json
+from collections import Counter
+
+
+class Diagnostics:
+    """ collects warnings, counted by kind and message, reported once at the end of a run """
+
+    # verbosity levels, what is printed while running
+    QUIET = 0  # nothing
+    NEW = 1  # first occurrence of each message
+    ALL = 2  # every occurrence
+
+    verbosity: int = NEW
+
+    # number of distinct messages kept per kind, further messages are counted as OTHER
+    max_messages: int = 1000
+    OTHER = "..."
+
+    # static class member, occurrences by kind and message
+    counts: typing.Dict[str, typing.Counter] = {}
+    # static class member, messages printed by kind, not reset by take(), thus each message is printed once per run
+    printed: typing.Dict[str, typing.Set[str]] = {}
+
+    @staticmethod
+    def print_new(kind: str, message: str) -> None:
+        """ print message if it was not printed yet, at most max_messages per kind """
+        printed = Diagnostics.printed.setdefault(kind, set())
+        if message not in printed and len(printed) < Diagnostics.max_messages:
+            printed.add(message)
+            print(message)
+
+    @staticmethod
+    def warn(kind: str, message: str) -> None:
+        """ record a warning of the given kind, e.g. "unrecognized_tag" """
+        messages = Diagnostics.counts.setdefault(kind, Counter())
+        if message not in messages and len(messages) >= Diagnostics.max_messages:
+            message = Diagnostics.OTHER
+        messages[message] += 1
+        if Diagnostics.verbosity >= Diagnostics.ALL:
+            print(message)
+        elif Diagnostics.verbosity == Diagnostics.NEW:
+            Diagnostics.print_new(kind, message)
+
+    @staticmethod
+    def take() -> typing.Dict[str, typing.Dict[str, int]]:
+        """ get and reset collected warnings, e.g. to send them from a worker process to main """
+        counts = {kind: dict(messages) for kind, messages in Diagnostics.counts.items()}
+        Diagnostics.counts = {}
+        return counts
+
+    @staticmethod
+    def merge(counts: typing.Dict[str, typing.Dict[str, int]]) -> None:
+        """ add warnings collected elsewhere, see take(), print those not printed yet """
+        for kind, messages in counts.items():
+            Diagnostics.counts.setdefault(kind, Counter()).update(messages)
+            if Diagnostics.verbosity == Diagnostics.NEW:
+                for message in messages:
+                    Diagnostics.print_new(kind, message)
+
+    @staticmethod
+    def get_summary(samples: int = 5) -> typing.Dict[str, typing.Dict]:
+        """ count, number of distinct messages and most frequent messages by kind """
+        summary = {}
+        for kind, messages in sorted(Diagnostics.counts.items()):
+            summary[kind] = {
+                "count": sum(messages.values()),
+                "distinct": len(messages),
+                "samples": [{"message": message, "count": count} for message, count in messages.most_common(samples)],
+            }
+        return summary
+
+    @staticmethod
+    def get_report(samples: int = 5) -> str:
+        """ human readable summary """
+        summary = Diagnostics.get_summary(samples)
+        if not summary:
+            return "no warnings"
+        lines = ["warnings:"]
+        for kind, entry in summary.items():
+            lines.append("    " + kind + ": " + str(entry["count"]) + " (" + str(entry["distinct"]) + " distinct)")
+            for sample in entry["samples"]:
+                lines.append("        " + str(sample["count"]).rjust(8) + "  " + sample["message"])
+        return "\n".join(lines)
+
+    @staticmethod
+    def write_json(file_name: str = "diagnostics.json", samples: int = 5) -> None:
+        with open(file_name, "w") as outfile:
+            json.dump(Diagnostics.get_summary(samples), outfile, indent=4, ensure_ascii=False)
@@ -1,15 +1,20 @@
 # pylint: disable=line-too-long
 
 from os import stat
+import os
 import typing
+import hashlib
+import io
+import json
 from math import floor
 import svgwrite
 import settings
 from way import Way
 from way_element import WayElement
+from layout import WayLayout, coalesce
+from file_writer import write_atomic
 import tagging
 import traffic_sign
-import svgutils
 
 
 class Drawing:
@@ -31,74 +36,129 @@ class Drawing:
         self.example_name = None
         self.labels_height_offset: float = 0
 
-    def add_group(self: 'Drawing', example: tagging.Example) -> None:
-        """ add an example to draw """
+    def add_group(self: 'Drawing', example: tagging.Example, example_label: bool = True) -> None:
+        """ add an example to draw, without example_label its name is not drawn, e.g. if the drawing is shared by several examples """
         tag_group: tagging.Tag_group
         count = 0
-        self.example_name = example.name
-        self.file_name = "svg/" + self.example_name.replace(" ", "_") + ".svg"
+        self.example_name = example.name if example_label else None
+        self.file_name = "svg/" + example.name.replace(" ", "_") + ".svg"
         for tag_group in example:
             self.ways.append(Way(tag_group.name, tag_group, count, len(example)))
             count += 1
 
+    def get_profile(self: 'Drawing') -> str:
+        """ hash of everything which is drawn, drawings with equal profiles are identical """
+        profile = [self.example_name, settings.Draw.get_hash()]
+        way: Way
+        for way in self.ways:
+            label = way.tags["name"] if "name" in way.tags else way.name
+            profile.append([label, "name" in way.tags, way.count == 0, way.count + 1 < way.total, sorted(way.filtered_tags.items())])
+        return hashlib.sha256(json.dumps(profile, ensure_ascii=False).encode("utf-8")).hexdigest()
+
     def draw(self: 'Drawing'):
         """ if all data to be used is set, call draw() """
+        # left edge of each way
+        self.way_x_offsets = []
+        self.labels_height_offset = 0
         total_elem_width = 0
 
         way: Way
         for way in self.ways:
+            self.way_x_offsets.append(total_elem_width)
             total_elem_width += way.get_width()
 
-        self.svg_obj = svgwrite.Drawing(self.file_name, profile='full', size=(floor(total_elem_width), floor(settings.Draw()["draw_height_meter"] * settings.Draw()["pixel_pro_meter"])))
+        draw_settings = settings.Draw.compiled()
+        draw_height = draw_settings.draw_height_pixel
+        self.svg_obj = svgwrite.Drawing(self.file_name, profile='full', size=(floor(total_elem_width), floor(draw_height)))
+        self.dash_patterns = {}
+
+        # overlap is used to draw elements over one-another to avoid issues with gaps
+        # between elements at differing zoom scales while viewing in-browser
+        overlap = 3.14
 
-        element_x_offset = 0
         way: Way
-        for way in self.ways:
-            way_x_offset = element_x_offset
+        for way, way_x_offset in zip(self.ways, self.way_x_offsets):
+            layout = way.get_layout()
             elem: WayElement
-            for elem in way.get_elements():
-                # print(elem)
-
-                # overlap is used to draw elements over one-another to avoid issues with gaps
-                # between elements at differing zoom scales while viewing in-browser
-                overlap = 3.14
-
-                # is dashable elem
-                if elem.get_distance() is not None:
-                    # draw dashed
-
-                    y_offset = 0
-                    # initially half at top
-                    self.svg_obj.add(self.svg_obj.rect((element_x_offset, y_offset), (elem.get_width()+overlap, elem.height()/2+overlap), fill=elem.colour))
-                    y_offset += elem.height()/2
-                    while y_offset < settings.Draw()["draw_height_meter"] * settings.Draw()["pixel_pro_meter"]:
-                        self.svg_obj.add(self.svg_obj.rect((element_x_offset, y_offset), (elem.get_width()+overlap, elem.get_distance()+overlap), fill=elem.background_colour))
-                        y_offset += elem.get_distance()
-                        self.svg_obj.add(self.svg_obj.rect((element_x_offset, y_offset), (elem.get_width()+overlap, elem.height()+overlap), fill=elem.colour))
-                        y_offset += elem.height()
-                else:  # solid
-                    self.svg_obj.add(self.svg_obj.rect((element_x_offset, 0), (elem.get_width()+overlap, elem.height()+overlap), fill=elem.colour))
-                element_x_offset += elem.get_width()
+            if draw_settings.flaechen_zusammenfassen:
+                # one rect per span of equal colour, overlap only at colour boundaries,
+                # lines and dashes are drawn on top in their exact size
+                for span in coalesce(layout, way.way_elems, draw_height):
+                    if span.count == 1:
+                        self.draw_element(way.way_elems[span.first], layout, span.first, way_x_offset + span.x_offset, overlap)
+                        continue
+                    self.svg_obj.add(self.svg_obj.rect((way_x_offset + span.x_offset, 0), (span.width+overlap, span.height+overlap), fill=span.colour))
+                    for index in span.overlays:
+                        elem = way.way_elems[index]
+                        self.draw_element(elem, layout, index, way_x_offset + layout.x_offsets[index], 0, background=elem.background_colour != span.colour)
+            else:
+                for index, elem in enumerate(way.way_elems):
+                    self.draw_element(elem, layout, index, way_x_offset + layout.x_offsets[index], overlap)
 
             if self.example_name is None:
                 label_y_offset = 0
             else:
                 label_y_offset = Drawing.label_height()
             if "name" in way.tags:
-                self.draw_label(way.tags["name"], way.get_width(), way_x_offset, label_y_offset, font_family="sans serif;font-style:italic", font_weight="normal")
+                self.draw_label(way.tags["name"], layout.width, way_x_offset, label_y_offset, font_family="sans serif;font-style:italic", font_weight="normal")
             else:
-                self.draw_label(way.name, way.get_width(), way_x_offset, label_y_offset, font_weight="normal")
+                self.draw_label(way.name, layout.width, way_x_offset, label_y_offset, font_weight="normal")
         if self.example_name is not None:
             self.draw_label(self.example_name, total_elem_width)
 
+        # signs are placed below the labels, thus after all labels are drawn
+        self.draw_traffic_signs()
+
+    def draw_element(self: 'Drawing', elem: WayElement, layout: WayLayout, index: int, x_offset: float, overlap: float, background: bool = True) -> None:
+        """ draw an element of a way, enlarged by overlap, without background the gaps of dashed elements are left out """
+        draw_settings = settings.Draw.compiled()
+        draw_height = draw_settings.draw_height_pixel
+        width = layout.widths[index]
+        height = layout.heights[index]
+
+        # is dashable elem
+        if layout.is_dashed(index):
+            # draw dashed
+            distance = layout.distances[index]
+            if draw_settings.gestrichelt_als_muster:
+                # as a single rect, filled with a repeating pattern of dash and gap
+                self.svg_obj.add(self.svg_obj.rect((x_offset, 0), (width+overlap, draw_height+overlap), fill=self.get_dash_pattern(height, distance, elem.colour, elem.background_colour)))
+            else:
+                y_offset = 0
+                # initially half at top
+                self.svg_obj.add(self.svg_obj.rect((x_offset, y_offset), (width+overlap, height/2+overlap), fill=elem.colour))
+                y_offset += height/2
+                while y_offset < draw_height:
+                    if background:
+                        self.svg_obj.add(self.svg_obj.rect((x_offset, y_offset), (width+overlap, distance+overlap), fill=elem.background_colour))
+                    y_offset += distance
+                    self.svg_obj.add(self.svg_obj.rect((x_offset, y_offset), (width+overlap, height+overlap), fill=elem.colour))
+                    y_offset += height
+        else:  # solid
+            self.svg_obj.add(self.svg_obj.rect((x_offset, 0), (width+overlap, height+overlap), fill=elem.colour))
+
+    def get_dash_pattern(self: 'Drawing', height: int, distance: int, colour: str, background_colour: str) -> str:
+        """ get reference to a pattern of dash and gap, define pattern on first use """
+        key = (height, distance, colour, background_colour)
+        if key not in self.dash_patterns:
+            # the pattern starts with half a dash, like the drawn dashes,
+            # it is horizontally uniform, thus one tile spans the whole drawing
+            width = self.svg_obj["width"]
+            pattern = self.svg_obj.pattern(insert=(0, 0), size=(width, height + distance), patternUnits="userSpaceOnUse", id="strichmuster" + str(len(self.dash_patterns)))
+            pattern.add(self.svg_obj.rect((0, 0), (width, height/2), fill=colour))
+            pattern.add(self.svg_obj.rect((0, height/2), (width, distance), fill=background_colour))
+            pattern.add(self.svg_obj.rect((0, height/2 + distance), (width, height/2), fill=colour))
+            self.svg_obj.defs.add(pattern)
+            self.dash_patterns[key] = pattern.get_funciri()
+        return self.dash_patterns[key]
+
     @staticmethod
     def label_height() -> float:
-        padding = 0.1 * settings.Draw()["pixel_pro_meter"]
-        return 1 * settings.Draw()["pixel_pro_meter"] - padding
+        return settings.Draw.compiled().label_height_pixel
 
     @staticmethod
     def get_padding() -> float:
-        return 0.1 * settings.Draw()["pixel_pro_meter"]
+        return settings.Draw.compiled().padding_pixel
 
     def draw_label(self: 'Drawing', label_text: str, way_width, x_offset=0, y_offset=0, font_family="serif", font_weight="bold") -> None:
         padding = self.get_padding()
@@ -114,69 +174,93 @@ class Drawing:
                               insert=(x_offset + way_width/2,
                                       y_offset + cover_height/2 + padding),
                               fill="#ffffff",
-                              style="font-size:" + str(0.5 * settings.Draw()["pixel_pro_meter"]) + "px;font-family:" + font_family + ";font-weight:" + font_weight + ";text-anchor:middle;dominant-baseline:central"
+                              style="font-size:" + str(settings.Draw.compiled().font_size_pixel) + "px;font-family:" + font_family + ";font-weight:" + font_weight + ";text-anchor:middle;dominant-baseline:central"
                               )
         )
 
+    def draw_traffic_signs(self: 'Drawing') -> None:
+        """ add traffic_signs on-top, below the labels """
+        # define each sign once, place it with references to its definition
+        defined_signs: typing.Set[str] = set()
+        way: Way
+        for way, way_x_offset in zip(self.ways, self.way_x_offsets):
+            way_traffic_sign_y_offset = 0
+            way_width = way.get_width()
+            sign: traffic_sign.TrafficSign
+            for sign in way.traffic_signs:
+                sign_offset_x = way_x_offset + way_width * sign.side_weight
+                sign_offset_y = self.labels_height_offset + sign.get_height()/2 + self.get_padding() + way_traffic_sign_y_offset
+
+                if sign_offset_x + sign.get_width() / 2 + self.get_padding() > way_x_offset + way_width:
+                    sign_offset_x = way_x_offset + way_width - (sign.get_width() / 2 + self.get_padding())
+                elif sign_offset_x + sign.get_width() / 2 + self.get_padding() < way_x_offset:
+                    sign_offset_x = way_x_offset + (sign.get_width() / 2 + self.get_padding())
+
+                if sign.name not in defined_signs:
+                    self.svg_obj.defs.add(sign.get_symbol())
+                    defined_signs.add(sign.name)
+                self.svg_obj.add(sign.get_use(sign_offset_x, sign_offset_y))
+                way_traffic_sign_y_offset += sign.get_height() + self.get_padding() + way_traffic_sign_y_offset
+
     def save(self: 'Drawing') -> None:
-        self.svg_obj.save()
+        write_atomic(self.file_name, self.get_svg().encode("utf-8"))
 
-        # add traffic_signs on-top afterward
-        has_traffic_signs = False
-        way: Way
-        for way in self.ways:
-            if len(way.traffic_signs) > 0:
-                has_traffic_signs = True
-                break
-
-        if has_traffic_signs:
-            svg_obj = svgutils.transform.fromfile(self.file_name)
-            way: Way
-            way_x_offset = 0
-            for way in self.ways:
-                way_traffic_sign_y_offset = 0
-                way_width = way.get_width()
-                sign: traffic_sign.TrafficSign
-                for sign in way.traffic_signs:
-                    sign_offset_x = way_x_offset + way_width * sign.side_weight
-                    sign_offset_y = self.labels_height_offset + sign.get_height()/2 + self.get_padding() + way_traffic_sign_y_offset
-
-                    if sign_offset_x + sign.get_width() / 2 + self.get_padding() > way_x_offset + way_width:
-                        sign_offset_x = way_x_offset + way_width - (sign.get_width() / 2 + self.get_padding())
-                    elif sign_offset_x + sign.get_width() / 2 + self.get_padding() < way_x_offset:
-                        sign_offset_x = way_x_offset + (sign.get_width() / 2 + self.get_padding())
-
-                    svg_obj.append(sign.get_svg(sign_offset_x, sign_offset_y))
-                    way_traffic_sign_y_offset += sign.get_height() + self.get_padding() + way_traffic_sign_y_offset
-                way_x_offset += way_width
-            svg_obj.save(self.file_name)
+    def get_svg(self: 'Drawing') -> str:
+        """ contents of the svg file, without writing it """
+        svg = io.StringIO()
+        self.svg_obj.write(svg)
+        return svg.getvalue()
+
+    def count_elements(self: 'Drawing', element_name: str, parent=None) -> int:
+        """ number of drawn svg elements of a kind, e.g. "rect", including those in defs """
+        if parent is None:
+            parent = self.svg_obj
+        count = 0
+        for elem in getattr(parent, "elements", []):
+            if elem.elementname == element_name:
+                count += 1
+            count += self.count_elements(element_name, elem)
+        return count
 
     @staticmethod
     def html_row(key, value, background_key=None, background_value=None) -> str:
         """ get html row for given tags, if background is given, style cell with color """
-        res = """\n                <tr>\n                    <td style="text-align: right;"""
+        parts = ["""\n                <tr>\n                    <td style="text-align: right;"""]
         if background_key is not None:
-            res += "background:" + background_key + ";"
-        res += """\"><code>"""
-        res += key
-        res += """</code></td>\n                    <td"""
+            parts += ["background:", background_key, ";"]
+        parts += ["""\"><code>""", key, """</code></td>\n                    <td"""]
         if background_value is not None:
-            res += " style=\"background:" + background_value + ";\""
-        res += """><code>"""
-        res += value
-        res += """</code></td>\n                </tr>"""
-        return res
-
-    def get_html(self: 'Drawing') -> str:
-        """ return representation as HTML table row """
-        res = """\n    <tr>\n        <td><img src=\""""
-        res += self.file_name
-        res += """\" height=\""""
-        res += str(300)
-        res += """px"></td>\n"""
+            parts += [" style=\"background:", background_value, ";\""]
+        parts += ["""><code>""", value, """</code></td>\n                </tr>"""]
+        return "".join(parts)
+
+    @staticmethod
+    def get_scaled_file_name(file_name: str, pixel_pro_meter: float) -> str:
+        """ file name of a drawing at another scale, e.g. svg/160/strasse2.svg for svg/strasse2.svg """
+        return os.path.join(os.path.dirname(file_name), "{:g}".format(pixel_pro_meter), os.path.basename(file_name))
+
+    @staticmethod
+    def get_image_html(src: str, view_box: typing.Optional[str] = None) -> str:
+        """ table cell showing an svg file, with view_box a symbol of a sprite sheet, e.g. sprite.svg#strasse2 """
+        if view_box is None:
+            return """<td><img src=\"""" + src + """\" height=\"""" + str(300) + """px"></td>"""
+        return """<td><svg height=\"""" + str(300) + """px" viewBox=\"""" + view_box + """\"><use href=\"""" + src + """\"/></svg></td>"""
+
+    @staticmethod
+    def get_row_html(image_html: str, tags_html: str) -> str:
+        """ html table row of an image cell, see get_image_html(), and the cells of the tags of the ways, see get_tags_html() """
+        return """\n    <tr>\n        """ + image_html + """\n""" + tags_html + """    </tr>"""
+
+    def get_html(self: 'Drawing', src: typing.Optional[str] = None, view_box: typing.Optional[str] = None) -> str:
+        """ return representation as HTML table row, with src and view_box showing a symbol of a sprite sheet instead of the svg file """
+        return Drawing.get_row_html(Drawing.get_image_html(self.file_name if src is None else src, view_box), self.get_tags_html())
+
+    def get_tags_html(self: 'Drawing') -> str:
+        """ html table cells of the tags of each way, the row without the image """
+        parts = []
         way: Way
         for way in self.ways:
-            res += """        <td>\n            <table border=1 frame=void>"""
+            parts.append("""        <td>\n            <table border=1 frame=void>""")
             for key, value in way.tags.items():
                 background_key = None
                 if key not in Way.recognized_tags and key not in Way.recognized_tags_any_value:
@@ -191,7 +275,7 @@ class Drawing:
                     else:
                         if key not in Way.recognized_tags_any_value:
                             background_value = "yellow"
-                res += Drawing.html_row(key, value, background_key, background_value)
+                parts.append(Drawing.html_row(key, value, background_key, background_value))
 
             for key, value in way.filtered_tags.items():
                 if key in way.tags:
@@ -208,7 +292,6 @@ class Drawing:
                         background_value = "darkgray"
                     else:
                         background_value = "orange"
-                res += Drawing.html_row(key, value, background_key, background_value)
-            res += """\n            </table>\n        </td>\n"""
-        res += """    </tr>"""
-        return res
+                parts.append(Drawing.html_row(key, value, background_key, background_value))
+            parts.append("""\n            </table>\n        </td>\n""")
+        return "".join(parts)
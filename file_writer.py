@@ -0,0 +1,108 @@
+# pylint: disable=missing-module-docstring
+
+import typing
+import os
+import queue
+import threading
+import time
+
+
+def get_temp_file_name(file_name: str) -> str:
+    """ file next to file_name to write to before renaming it to file_name, unique per process and thread """
+    return file_name + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp"
+
+
+def write_atomic(file_name: str, data: bytes) -> None:
+    """ write to a temporary file next to file_name, then rename it, readers never see a partly written file """
+    temp_file_name = get_temp_file_name(file_name)
+    try:
+        with open(temp_file_name, "wb") as outfile:
+            outfile.write(data)
+        os.replace(temp_file_name, file_name)
+    except OSError:
+        if os.path.exists(temp_file_name):
+            os.remove(temp_file_name)
+        raise
+
+
+class FileWriter:
+    """ writes files in background threads while drawing continues,
+    put() blocks while queue_size files are waiting, with threads=0 it writes them itself """
+    threads: typing.List[threading.Thread]
+    queue: queue.Queue
+    # contents of files not written yet, by file name
+    pending: typing.Dict[str, bytes]
+    error: typing.Optional[OSError]
+
+    def __init__(self: 'FileWriter', threads: int = 4, queue_size: typing.Optional[int] = None) -> 'FileWriter':
+        self.queue = queue.Queue(maxsize=queue_size if queue_size is not None else 16 * threads)
+        self.pending = {}
+        self.error = None
+        self.lock = threading.Lock()
+        self.stats = {"files": 0, "bytes": 0, "write_seconds": 0.0, "wait_seconds": 0.0}
+        self.start = None
+        self.seconds = 0.0
+        self.threads = [threading.Thread(target=self.work, name="file_writer" + str(number), daemon=True) for number in range(threads)]
+        for thread in self.threads:
+            thread.start()
+
+    def write(self: 'FileWriter', file_name: str, data: bytes) -> None:
+        start = time.perf_counter()
+        try:
+            write_atomic(file_name, data)
+        except OSError as error:
+            with self.lock:
+                self.error = self.error or error
+        with self.lock:
+            self.stats["files"] += 1
+            self.stats["bytes"] += len(data)
+            self.stats["write_seconds"] += time.perf_counter() - start
+            # a newer version of the file may have been queued meanwhile
+            if self.pending.get(file_name) is data:
+                del self.pending[file_name]
+
+    def work(self: 'FileWriter') -> None:
+        while (item := self.queue.get()) is not None:
+            self.write(*item)
+
+    def put(self: 'FileWriter', file_name: str, data: bytes) -> None:
+        """ queue a file to be written, raises the error of a previous write if one failed """
+        if self.error is not None:
+            raise self.error
+        if self.start is None:
+            self.start = time.perf_counter()
+        with self.lock:
+            self.pending[file_name] = data
+        if not self.threads:
+            self.write(file_name, data)
+            return
+        start = time.perf_counter()
+        self.queue.put((file_name, data))
+        self.stats["wait_seconds"] += time.perf_counter() - start
+
+    def read(self: 'FileWriter', file_name: str) -> bytes:
+        """ contents of a file, also while it is queued """
+        with self.lock:
+            data = self.pending.get(file_name)
+        if data is not None:
+            return data
+        with open(file_name, "rb") as infile:
+            return infile.read()
+
+    def close(self: 'FileWriter') -> None:
+        """ wait until all files are written, raises the error of the first failed write """
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+        if self.start is not None:
+            self.seconds = time.perf_counter() - self.start
+        if self.error is not None:
+            raise self.error
+
+    def get_report(self: 'FileWriter') -> str:
+        megabytes = self.stats["bytes"] / 1e6
+        throughput = megabytes / self.seconds if self.seconds else 0.0
+        return "wrote {} files, {:.1f} MB in {:.2f}s ({:.1f} MB/s, {:.2f}s writing), drawing waited {:.2f}s for the queue".format(
+            self.stats["files"], megabytes, self.seconds, throughput, self.stats["write_seconds"], self.stats["wait_seconds"])
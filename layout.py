@@ -0,0 +1,87 @@
+# pylint: disable=missing-module-docstring
+
+import typing
+from array import array
+from way_element import WayElement
+
+# distance of solid elements in WayLayout.distances
+SOLID = -1
+
+
+class WayLayout:
+    """ pixel geometry of the elements of a way, computed once and stored column-wise """
+    x_offsets: array
+    widths: array
+    heights: array
+    distances: array
+    width: int
+
+    def __init__(self: 'WayLayout', way_elems: typing.List[WayElement]) -> 'WayLayout':
+        # x offsets are relative to the left edge of the way
+        self.x_offsets = array("l")
+        self.widths = array("l")
+        self.heights = array("l")
+        self.distances = array("l")
+
+        x_offset = 0
+        elem: WayElement
+        for elem in way_elems:
+            width = elem.get_width()
+            distance = elem.get_distance()
+            self.x_offsets.append(x_offset)
+            self.widths.append(width)
+            self.heights.append(elem.height())
+            self.distances.append(SOLID if distance is None else distance)
+            x_offset += width
+        self.width = x_offset
+
+    def __len__(self: 'WayLayout') -> int:
+        return len(self.widths)
+
+    def is_dashed(self: 'WayLayout', index: int) -> bool:
+        return self.distances[index] != SOLID
+
+
+class Span(typing.NamedTuple):
+    """ adjacent elements of a way drawn as one rect of colour, the elements overlays are drawn on top of it """
+    first: int  # index of the first element
+    count: int
+    x_offset: int
+    width: int
+    height: int
+    colour: str
+    overlays: typing.List[int]
+
+
+def coalesce(layout: WayLayout, way_elems: typing.List[WayElement], draw_height: int) -> typing.List[Span]:
+    """ merge adjacent elements of the same colour into spans, the colour of dashed elements is their background,
+    a single element between two elements of the same colour, e.g. a line on a road, is an overlay of their span """
+    def get_base(index: int) -> typing.Tuple[str, int]:
+        elem = way_elems[index]
+        if layout.is_dashed(index):
+            return elem.background_colour, draw_height
+        return elem.colour, layout.heights[index]
+
+    spans: typing.List[Span] = []
+    index = 0
+    while index < len(layout):
+        base = get_base(index)
+        first = index
+        overlays = []
+        if layout.is_dashed(index):
+            overlays.append(index)
+        index += 1
+        while index < len(layout):
+            if get_base(index) == base:
+                if layout.is_dashed(index):
+                    overlays.append(index)
+            elif index + 1 < len(layout) and get_base(index + 1) == base:
+                overlays.append(index)
+            else:
+                break
+            index += 1
+        if index - first == 1:
+            # drawn as before, e.g. a dashed element with a background of its own as a single pattern
+            overlays = []
+        spans.append(Span(first, index - first, layout.x_offsets[first], layout.x_offsets[index - 1] + layout.widths[index - 1] - layout.x_offsets[first], base[1], base[0], overlays))
+    return spans
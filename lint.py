@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+""" check which tags of ways are recognized, without drawing
+
+counts each tag=value pair by its class (recognized, ignored, unrecognized value, unrecognized tag)
+and constructs the elements of each way, reports unknown or missing highway values and missing sign files """
+
+import argparse
+import collections
+import json
+import os
+import sys
+import time
+import typing
+import settings
+import osm
+from way import Way, TAG_RECOGNIZED, TAG_IGNORED, TAG_UNRECOGNIZED_VALUE, TAG_UNRECOGNIZED_IGNORED_VALUE, TAG_UNRECOGNIZED
+from tagging import TagIndex
+from diagnostics import Diagnostics
+from traffic_sign import SignAsset
+
+# names of tag classes, as the warning kinds of Way.filter_tags()
+TAG_CLASS_NAMES = {
+    TAG_RECOGNIZED: "recognized",
+    TAG_IGNORED: "ignored",
+    TAG_UNRECOGNIZED_VALUE: "unrecognized_value",
+    TAG_UNRECOGNIZED_IGNORED_VALUE: "unrecognized_ignored_value",
+    TAG_UNRECOGNIZED: "unrecognized_tag",
+}
+# class of the values counted as Diagnostics.OTHER beyond max_values, they may be of any class
+OTHER_VALUES = "other_values"
+
+
+class LintWay(Way):
+    """ way whose elements are constructed, its traffic signs are only looked up, their files are not parsed """
+
+    # static class member, whether a sign file exists by path
+    sign_files: typing.Dict[str, bool] = {}
+
+    def add_traffic_sign(self: 'LintWay', sign_name: str, side_weight=1/2) -> None:
+        if sign_name.startswith("DE:"):
+            sign_name = sign_name[3:]
+        path = SignAsset.get_path(sign_name)
+        exists = LintWay.sign_files.get(path)
+        if exists is None:
+            exists = LintWay.sign_files[path] = os.path.exists(path)
+        if not exists:
+            Diagnostics.warn("missing_sign", "warning: no file " + path + " for traffic sign " + sign_name)
+
+
+class Linter:
+    """ counts tag=value pairs of ways, constructs the elements of each distinct kind of way once """
+    max_values: int
+    ways: int
+    # occurrences by tag and value, at most max_values values per tag, further values are counted as Diagnostics.OTHER
+    values: typing.Dict[str, typing.Dict[str, int]]
+    # occurrences of ways by the tags their elements depend on, and the warnings of constructing them
+    profiles: typing.Counter
+    warnings: typing.Dict[typing.Tuple, typing.Dict[str, typing.Dict[str, int]]]
+
+    def __init__(self: 'Linter', max_values: int = 1000) -> 'Linter':
+        self.max_values = max_values
+        self.ways = 0
+        self.values = {}
+        self.profiles = collections.Counter()
+        self.warnings = {}
+
+    def add(self: 'Linter', tags: typing.Dict[str, str], count: int = 0, total: int = 1) -> None:
+        """ add the tags of a way, the count-th of total ways drawn side by side """
+        self.ways += 1
+        recognized = []
+        for tag, value in tags.items():
+            values = self.values.get(tag)
+            if values is None:
+                values = self.values[tag] = {}
+            if value in values:
+                values[value] += 1
+            elif len(values) < self.max_values:
+                values[value] = 1
+            else:
+                values[Diagnostics.OTHER] = values.get(Diagnostics.OTHER, 0) + 1
+            # tags recognized with any value, e.g. name, are labels, elements do not depend on them
+            if Way.pair_classes.get((tag, value)) == TAG_RECOGNIZED:
+                recognized.append((tag, value))
+        recognized.sort()
+        self.profiles[(tags.get("highway"), count == 0, count + 1 < total, tuple(recognized))] += 1
+
+    def construct(self: 'Linter', profile: typing.Tuple) -> typing.Dict[str, typing.Dict[str, int]]:
+        """ warnings of constructing the elements of a way, except those of unrecognized tags, see get_tags() """
+        highway, first, not_last, recognized = profile
+        tags = dict(recognized)
+        if highway is not None:
+            tags["highway"] = highway
+        # any position with the same neighbours, e.g. the second of three ways
+        count = 0 if first else 1
+        try:
+            LintWay("lint", tags, count, count + 1 + not_last)
+        except (ValueError, KeyError, TypeError, AttributeError) as error:
+            Diagnostics.warn("construction_error", "error: " + repr(error) + " constructing " + str(tags))
+        warnings = Diagnostics.take()
+        for kind in TAG_CLASS_NAMES.values():
+            warnings.pop(kind, None)
+        return warnings
+
+    def get_warnings(self: 'Linter') -> typing.Dict[str, typing.Dict[str, int]]:
+        """ warnings of constructing all ways, counted per way """
+        counts: typing.Dict[str, typing.Counter] = {}
+        for profile, ways in self.profiles.items():
+            if profile not in self.warnings:
+                self.warnings[profile] = self.construct(profile)
+            for kind, messages in self.warnings[profile].items():
+                for message, count in messages.items():
+                    counts.setdefault(kind, collections.Counter())[message] += count * ways
+        return {kind: dict(messages) for kind, messages in counts.items()}
+
+    def get_tags(self: 'Linter') -> typing.List[typing.Dict]:
+        """ tag=value pairs with their class and occurrences, most frequent first """
+        entries = []
+        for tag, values in self.values.items():
+            for value, count in values.items():
+                tag_class = OTHER_VALUES if value == Diagnostics.OTHER else TAG_CLASS_NAMES[Way.classify_tag(tag, value)]
+                entries.append({"tag": tag, "value": value, "class": tag_class, "count": count})
+        entries.sort(key=lambda entry: (-entry["count"], entry["tag"], entry["value"]))
+        return entries
+
+
+def get_report(tags: typing.List[typing.Dict], top: int) -> str:
+    """ human readable summary, the top most frequent pairs of each class except recognized """
+    lines = []
+    for tag_class in list(TAG_CLASS_NAMES.values()) + [OTHER_VALUES]:
+        entries = [entry for entry in tags if entry["class"] == tag_class]
+        lines.append(tag_class + ": " + str(sum(entry["count"] for entry in entries)) + " (" + str(len(entries)) + " distinct)")
+        if tag_class == "recognized":
+            continue
+        for entry in entries[:top]:
+            lines.append("    " + str(entry["count"]).rjust(8) + "  " + entry["tag"] + "=" + entry["value"])
+    return "\n".join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--osm", metavar="FILE", help="check the ways of an .osm(.gz|.bz2) file instead of the examples in tags/")
+    parser.add_argument("--all-ways", action="store_true", help="with --osm also check ways without highway tag")
+    parser.add_argument("--select", action="append", metavar="GLOB", help="only check examples of tags/ whose name matches GLOB, can be repeated")
+    parser.add_argument("--tags-file", action="append", metavar="FILE", help="only check examples of this file in tags/, can be repeated")
+    parser.add_argument("--max-values", type=int, default=1000, metavar="N", help="distinct values counted per tag, further values are counted as ... (default: 1000)")
+    parser.add_argument("--top", type=int, default=20, metavar="N", help="number of most frequent pairs printed per class (default: 20)")
+    parser.add_argument("-o", "--output", default="lint.json", metavar="FILE", help="write all pairs and warnings to FILE (default: lint.json)")
+    args = parser.parse_args()
+
+    Diagnostics.verbosity = Diagnostics.QUIET
+    settings.Draw.set_default_settings()
+    # warnings of the settings file are not about tags
+    Diagnostics.take()
+
+    start = time.perf_counter()
+    linter = Linter(args.max_values)
+    if args.osm is not None:
+        for _, tags in osm.OsmWays(args.osm, None if args.all_ways else "highway").iter_tags():
+            linter.add(tags)
+    else:
+        for example in TagIndex(index_file="tags_index.json").select(args.select, args.tags_file):
+            for count, tag_group in enumerate(example):
+                linter.add(tag_group, count, len(example))
+    warnings = linter.get_warnings()
+    seconds = time.perf_counter() - start
+
+    tags = linter.get_tags()
+    print(get_report(tags, args.top))
+    Diagnostics.merge(warnings)
+    print(Diagnostics.get_report())
+    print("checked", linter.ways, "ways,", len(linter.profiles), "distinct kinds of ways, in", "{:.2f}s".format(seconds),
+          "({:.0f} ways/s)".format(linter.ways / seconds if seconds else 0.0))
+    with open(args.output, "w") as outfile:
+        json.dump({"ways": linter.ways, "seconds": seconds, "tags": tags, "warnings": Diagnostics.get_summary()}, outfile, indent=4, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,15 +2,225 @@
 
 """ generate example data, draw data """
 
+import argparse
+from concurrent.futures import Executor, ProcessPoolExecutor
+import contextlib
+import fnmatch
+import functools
+import itertools
+import os
+import typing
 import tagging
-from tagging import Tags
+from tagging import TagIndex
 import settings
 import drawing
+import osm
+from build_cache import BuildCache
+from render_memo import RenderMemo
+from diagnostics import Diagnostics
+from profiling import Profiler
+from report import ReportWriter, get_highway_category
+from watch import Watcher
+from sprite import SpriteSheet
+from render_store import RenderStore
+from file_writer import FileWriter
+from traffic_sign import SignAsset
+from way import TAG_WARNING_KINDS
+
+
+class RenderResult(typing.NamedTuple):
+    """ drawn example, the inputs it used and what happened while drawing it """
+    file_name: str
+    # html table cells of its tags, the row is completed by the image cell when written, see Drawing.get_row_html()
+    tags_html: str
+    settings_keys: typing.List[str]
+    assets: typing.List[str]
+    # svg files to write, written by the main process
+    files: typing.List[typing.Tuple[str, bytes]]
+    warnings: typing.Dict[str, typing.Dict[str, int]]
+    # stage times and counters, if profiling
+    profile: typing.Optional[typing.Dict]
+
+
+# number of examples looked up in the build manifest and drawn at once
+BATCH_SIZE = 1000
+
+
+def render_example(index: int, example: tagging.Example, file_name: typing.Optional[str] = None, scales: typing.Optional[typing.List[float]] = None) -> RenderResult:
+    """ draw a single example, return its svg file to write, its html table row and the inputs it used,
+    with file_name the drawing is shared with other examples, thus the example name is not drawn,
+    with scales it is drawn once per pixel_pro_meter, e.g. to svg/80/ and svg/160/, the row shows the first """
+    # only warnings of this example are returned, also when drawn in the main process
+    previous_warnings = Diagnostics.take()
+    settings.Draw.start_tracking()
+    record = Profiler.new_record(example.name)
+    parse_count = SignAsset.parse_count
+
+    # name the drawing explicitly instead of relying on the class-level counter,
+    # which is not shared between worker processes
+    d_file = drawing.Drawing("default" + str(index) + ".svg")
+
+    # add tags
+    with Profiler.stage("add_group", record):
+        if file_name is None:
+            d_file.add_group(example)
+        else:
+            d_file.add_group(example, example_label=False)
+            d_file.file_name = file_name
+
+    # process tags, once per scale, the ways and their elements are reused
+    base_file_name = d_file.file_name
+    counters = {"rects": 0, "signs": 0, "bytes": 0}
+    files = []
+    for scale in scales or [None]:
+        if scale is not None:
+            settings.Draw.set_scale(scale)
+            d_file.file_name = drawing.Drawing.get_scaled_file_name(base_file_name, scale)
+            os.makedirs(os.path.dirname(d_file.file_name), exist_ok=True)
+
+        with Profiler.stage("draw", record):
+            d_file.draw()
+
+        # serialize processed tags, the file (with default, indexed name) is written in the background
+        with Profiler.stage("save", record):
+            files.append((d_file.file_name, d_file.get_svg().encode("utf-8")))
+
+        if Profiler.enabled:
+            counters["rects"] += d_file.count_elements("rect")
+            counters["signs"] += d_file.count_elements("use")
+            counters["bytes"] += len(files[-1][1])
+    if scales:
+        settings.Draw.set_scale(None)
+        d_file.file_name = drawing.Drawing.get_scaled_file_name(base_file_name, scales[0])
+
+    with Profiler.stage("get_html", record):
+        tags_html = d_file.get_tags_html()
+
+    if Profiler.enabled:
+        counters["parsed_files"] = SignAsset.parse_count - parse_count
+        record["counters"] = counters
+    else:
+        record = None
+
+    assets = [sign.get_path() for way in d_file.ways for sign in way.traffic_signs]
+    warnings = Diagnostics.take()
+    Diagnostics.merge(previous_warnings)
+    return RenderResult(d_file.file_name, tags_html, settings.Draw.stop_tracking(), assets, files, warnings, record)
+
+
+def init_worker(verbosity: int, profile: bool) -> None:
+    """ load draw settings once per worker process, from the settings file written by main() """
+    # first occurrences are printed by the main process when merging, workers only print with ALL
+    Diagnostics.verbosity = verbosity if verbosity >= Diagnostics.ALL else Diagnostics.QUIET
+    Profiler.enabled = profile
+    settings.Draw.init()
+    # warnings of the settings file were already collected by main()
+    Diagnostics.take()
+
+
+def batched(iterable: typing.Iterable, size: int) -> typing.Iterator[typing.List]:
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+def render_examples(examples: typing.Iterable[tagging.Example], cache: BuildCache, writer: FileWriter, executor: typing.Optional[Executor] = None, jobs: int = 1, memo: typing.Optional[RenderMemo] = None, scales: typing.Optional[typing.List[float]] = None) -> typing.Iterator[typing.Tuple[tagging.Example, str]]:
+    """ draw examples batch by batch, yield them with the html table cells of their tags in the order of examples,
+    their svg files are queued to writer, thus may not be written yet,
+    with memo examples with the same profile share one drawing, with scales each is drawn once per pixel_pro_meter """
+    for batch in batched(enumerate(examples), BATCH_SIZE):
+        # only draw examples whose tags, settings or traffic sign files changed since the last run
+        cells: typing.List[typing.Optional[str]] = [cache.lookup(example) for _, example in batch]
+        todo = [position for position, tags_html in enumerate(cells) if tags_html is None]
+
+        # examples to draw, with the file to draw to if shared
+        to_draw = [(position, None) for position in todo]
+        shared: typing.Dict[int, drawing.Drawing] = {}
+        if memo is not None:
+            to_draw = []
+            for position, tags_html in enumerate(cells):
+                if tags_html is not None:
+                    memo.add_to_index(batch[position][1], cache.entries[batch[position][1].name]["file_name"])
+            for position in todo:
+                d_file, is_new = memo.add(batch[position][1])
+                shared[position] = d_file
+                if is_new:
+                    to_draw.append((position, d_file.file_name))
+
+        indices = [batch[position][0] for position, _ in to_draw]
+        draw_examples = [batch[position][1] for position, _ in to_draw]
+        file_names = [file_name for _, file_name in to_draw]
+        if executor is None:
+            results = map(render_example, indices, draw_examples, file_names, itertools.repeat(scales))
+        else:
+            # map keeps the order of examples
+            results = executor.map(render_example, indices, draw_examples, file_names, itertools.repeat(scales), chunksize=max(1, len(to_draw) // (jobs * 4)))
+
+        result: RenderResult
+        for (position, _), result in zip(to_draw, results):
+            for file_name, data in result.files:
+                writer.put(file_name, data)
+            cache.store(batch[position][1], result.file_name, result.tags_html, result.settings_keys, result.assets)
+            cells[position] = result.tags_html
+            if result.profile is not None:
+                Profiler.add_example(result.profile)
+            if memo is None:
+                Diagnostics.merge(result.warnings)
+            else:
+                # tags of all examples were already classified by memo.add(), thus their warnings are counted
+                Diagnostics.merge({kind: messages for kind, messages in result.warnings.items() if kind not in TAG_WARNING_KINDS})
+                memo.inputs[result.file_name] = (result.settings_keys, result.assets)
+
+        # examples sharing a drawing with another example
+        for position, d_file in shared.items():
+            if scales:
+                # drawn to svg/<scale>/ by render_example, the row shows the first scale
+                d_file.file_name = drawing.Drawing.get_scaled_file_name(d_file.file_name, scales[0])
+                memo.add_to_index(batch[position][1], d_file.file_name)
+            if cells[position] is None:
+                settings_keys, assets = memo.inputs[d_file.file_name]
+                cells[position] = d_file.get_tags_html()
+                cache.store(batch[position][1], d_file.file_name, cells[position], settings_keys, assets)
+        yield from zip((example for _, example in batch), cells)
+
+
+def parse_number(text: str) -> typing.Union[int, float]:
+    """ number of a command line argument, whole numbers as int like in draw_settings.json """
+    value = float(text)
+    return int(value) if value.is_integer() else value
 
 
 def main():
     """ generate example data, draw data """
 
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of processes to draw examples with (default: 1)")
+    parser.add_argument("--rebuild", action="store_true", help="ignore the build manifest and redraw every example")
+    parser.add_argument("--osm", metavar="FILE", help="draw the highways of an .osm(.gz|.bz2) file instead of the examples in tags/")
+    parser.add_argument("--dedupe", action="store_true", help="draw examples with the same recognized tags only once, without example name, see render_index.json")
+    parser.add_argument("-v", "--verbose", action="count", default=0, help="print every warning while running, not only the first of each")
+    parser.add_argument("-q", "--quiet", action="store_true", help="print no warnings while running, only the summary")
+    parser.add_argument("--profile", nargs="?", const="profile.json", metavar="FILE", help="measure time and counters per stage and example, write them to FILE (default: profile.json)")
+    parser.add_argument("--profile-format", choices=["summary", "chrome"], default="summary", help="write a summary with all examples, or chrome trace events")
+    parser.add_argument("--profile-top", type=int, default=10, metavar="N", help="number of slowest examples to report (default: 10)")
+    parser.add_argument("--page-size", type=int, metavar="N", help="split tagging_generated.html into pages of N examples, linked from an index page")
+    parser.add_argument("--split-by-highway", action="store_true", help="one page per combination of highway values of the ways of an example, linked from an index page")
+    parser.add_argument("--select", action="append", metavar="GLOB", help="only draw examples whose name matches GLOB, e.g. 'strasse2*' or 'way_123', can be repeated")
+    parser.add_argument("--tags-file", action="append", metavar="FILE", help="only draw examples of this file in tags/, e.g. tags.json, can be repeated")
+    parser.add_argument("--watch", action="store_true", help="after drawing, keep running and redraw the examples affected by changes of tags/, draw_settings.json or sign files")
+    parser.add_argument("--sprite", nargs="?", const="sprite.svg", metavar="FILE", help="also pack all drawings into one svg file as symbols, referenced by tagging_generated.html as FILE#name (default: sprite.svg)")
+    parser.add_argument("--sprite-shard-size", type=int, metavar="N", help="split the sprite sheet into files of N drawings, e.g. sprite_0.svg")
+    parser.add_argument("--scales", type=parse_number, nargs="+", metavar="PIXEL_PRO_METER", help="draw each example once per scale, e.g. --scales 40 80 160 to svg/40/, svg/80/ and svg/160/, instead of with pixel_pro_meter of draw_settings.json")
+    parser.add_argument("--writers", type=int, default=4, metavar="N", help="number of threads writing svg files while drawing continues, 0 to write them before drawing the next example (default: 4)")
+    parser.add_argument("--store", nargs="?", const="render_store", metavar="PREFIX", help="also add all drawings to PREFIX.blob, found by way id or example name via PREFIX.idx, see render_store.py (default: render_store)")
+    args = parser.parse_args()
+    if args.watch and (args.osm is not None or args.dedupe or args.sprite is not None or args.store is not None):
+        parser.error("--watch can not be combined with --osm, --dedupe, --sprite or --store")
+
+    Profiler.enabled = args.profile is not None
+
+    Diagnostics.verbosity = Diagnostics.QUIET if args.quiet else min(Diagnostics.NEW + args.verbose, Diagnostics.ALL)
+
     # generate default draw settings,
     # add default draw settings
     settings.Draw.set_default_settings()
@@ -18,44 +228,70 @@ def main():
     # save draw settings
     settings.Draw.write_draw_settings()
 
-    html = "<table><td style=\"    vertical-align: top;\">"
-    html += "<table border=1 frame=void>\n"
-    html += """    <tr>
-        <th>svg</th>
-        <th>Way 1</th>
-        <th>Way 2</th>
-        <th>Way 3</th>
-    </tr>"""
-
-    tags = Tags()
-    example: tagging.Example
-    # draw each group of tags separately
-    for example in tags:
-        d_file = drawing.Drawing()
-
-        # add tags
-        d_file.add_group(example)
-
-        # process tags
-        d_file.draw()
+    index = None
+    if args.osm is None:
+        with Profiler.stage("index_tags"):
+            # only the index is read here, examples are loaded while drawing, measured as load_tags
+            index = TagIndex(index_file="tags_index.json")
+            examples = index.select(args.select, args.tags_file)
+    else:
+        # streamed in file order, not sorted
+        examples = osm.OsmWays(args.osm)
+        if args.select is not None:
+            examples = (example for example in examples if any(fnmatch.fnmatchcase(example.name, pattern) for pattern in args.select))
 
-        # save processed tags to a file (with default, indexed name)
-        d_file.save()
+    def new_report() -> ReportWriter:
+        return ReportWriter(page_size=args.page_size, get_category=get_highway_category if args.split_by_highway else None)
 
-        html += d_file.get_html()
-    html += "</table>\n"
+    report = new_report()
+    cache = BuildCache(load=not args.rebuild, scales=args.scales, dedupe=args.dedupe)
+    memo = RenderMemo() if args.dedupe else None
+    sheet = SpriteSheet(args.sprite, args.sprite_shard_size) if args.sprite is not None else None
+    store = RenderStore(args.store) if args.store is not None else None
+    writer = FileWriter(args.writers)
+    with ProcessPoolExecutor(max_workers=args.jobs, initializer=init_worker, initargs=(Diagnostics.verbosity, Profiler.enabled)) if args.jobs > 1 else contextlib.nullcontext() as executor:
+        # draw each group of tags separately, write each row as soon as it is drawn
+        for example, tags_html in render_examples(Profiler.iterate(examples, "load_tags"), cache, writer, executor, args.jobs, memo, args.scales):
+            file_name = cache.entries[example.name]["file_name"]
+            if store is not None:
+                # unchanged drawings are stored once, their entries are only renewed
+                store.add(example.name, writer.read(file_name), osm.OsmWays.get_way_id(example.name))
+            if sheet is not None:
+                # the symbol of the drawing in the sprite sheet instead of its svg file
+                image_html = drawing.Drawing.get_image_html(*sheet.add(file_name, writer.read(file_name)))
+            else:
+                image_html = drawing.Drawing.get_image_html(file_name)
+            report.write_row(example, drawing.Drawing.get_row_html(image_html, tags_html))
+    # only files that were written are kept in the build manifest
+    with Profiler.stage("write_files"):
+        writer.close()
+    print(writer.get_report())
+    if sheet is not None:
+        sheet.save()
+    if store is not None:
+        store.save()
+        store.close()
+        print("added", store.added_bytes, "bytes to", store.prefix + ".blob")
+    # entries of examples removed from tags/ are dropped, with --osm all loaded entries are kept
+    cache.save(index.get_names() if index is not None else None)
+    if memo is not None:
+        memo.save_index()
+        print(len(memo.index), "examples drawn as", memo.get_unique_count(), "unique drawings")
 
-    html += "<td></td>"
+    # examples taken from the build manifest are not checked again, thus their warnings are missing
+    print(Diagnostics.get_report())
+    Diagnostics.write_json()
 
-    html += "<td style=\"vertical-align: top;\">"
-    with open("tagging.html") as infile:
-        html += infile.read()
-    html += "</td>"
+    with Profiler.stage("write_html"):
+        report.close()
 
-    html += "</td></table>\n"
+    if Profiler.enabled:
+        print(Profiler.get_report(args.profile_top))
+        Profiler.write_json(args.profile, args.profile_format == "chrome", args.profile_top)
 
-    with open("tagging_generated.html", "w") as outfile:
-        outfile.write(html)
+    if args.watch:
+        Diagnostics.take()
+        Watcher(cache, new_report, functools.partial(render_example, scales=args.scales), args.select, args.tags_file).run()
 
 
 if __name__ == "__main__":
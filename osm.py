@@ -0,0 +1,82 @@
+# pylint: disable=missing-module-docstring
+
+import typing
+import bz2
+import gzip
+from xml.parsers import expat
+import tagging
+
+# bytes of an .osm file parsed at once
+CHUNK_SIZE = 1 << 20
+
+
+def open_osm_file(file_name: str) -> typing.BinaryIO:
+    """ open .osm file, also compressed as .osm.gz or .osm.bz2 """
+    if file_name.endswith(".gz"):
+        return gzip.open(file_name, "rb")
+    if file_name.endswith(".bz2"):
+        return bz2.open(file_name, "rb")
+    return open(file_name, "rb")
+
+
+class OsmWays:
+    """ streams the ways of an .osm xml file as examples, one way per example, without reading the whole file """
+    file_name: str
+    required_key: typing.Optional[str]
+
+    def __init__(self: 'OsmWays', file_name: str, required_key: typing.Optional[str] = "highway") -> 'OsmWays':
+        # ways without the required key, e.g. buildings, are skipped, None to keep all ways
+        self.file_name = file_name
+        self.required_key = required_key
+
+    def __iter__(self: 'OsmWays') -> typing.Iterator[tagging.Example]:
+        for count, (way_id, tags) in enumerate(self.iter_tags()):
+            yield OsmWays.make_example(way_id, tags, count)
+
+    def iter_tags(self: 'OsmWays') -> typing.Iterator[typing.Tuple[str, typing.Dict[str, str]]]:
+        """ id and tags of each way, without making examples """
+        # ways finished in the current chunk, id and tags of the way being parsed
+        ways: typing.List[typing.Tuple[str, typing.Dict[str, str]]] = []
+        way: typing.Optional[typing.Tuple[str, typing.Dict[str, str]]] = None
+
+        # expat handlers instead of element trees, only ways and their tags are kept
+        def start_element(name: str, attributes: typing.Dict[str, str]) -> None:
+            nonlocal way
+            if name == "tag":
+                if way is not None:
+                    way[1][attributes["k"]] = attributes["v"]
+            elif name == "way":
+                way = (attributes["id"], {})
+
+        def end_element(name: str) -> None:
+            nonlocal way
+            if name == "way":
+                if self.required_key is None or self.required_key in way[1]:
+                    ways.append(way)
+                way = None
+
+        parser = expat.ParserCreate()
+        parser.StartElementHandler = start_element
+        parser.EndElementHandler = end_element
+        with open_osm_file(self.file_name) as osm_file:
+            while chunk := osm_file.read(CHUNK_SIZE):
+                parser.Parse(chunk, False)
+                yield from ways
+                ways.clear()
+            parser.Parse(b"", True)
+            yield from ways
+
+    @staticmethod
+    def get_way_id(example_name: str) -> typing.Optional[int]:
+        """ id of the way of an example made by make_example(), None for other examples """
+        if example_name.startswith("way_") and example_name[4:].isdigit():
+            return int(example_name[4:])
+        return None
+
+    @staticmethod
+    def make_example(way_id: str, tags: typing.Dict[str, str], sort_weight: float) -> tagging.Example:
+        return tagging.Example("way_" + way_id, {
+            "sort_weight": sort_weight,
+            # label by kind of way, the id is in the example name, ways with equal tags then look the same
+            "ways": [{"name": tags.get("highway", "way"), "direction": "up", "tags": tags}]
+        })
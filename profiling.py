@@ -0,0 +1,109 @@
+# pylint: disable=missing-module-docstring
+
+import typing
+import contextlib
+import json
+import os
+import time
+
+
+class Profiler:
+    """ wall time of stages and counters per example, collected with main.py --profile """
+
+    enabled: bool = False
+
+    # static class members, trace events of all stages and records of all drawn examples
+    events: typing.List[typing.Dict] = []
+    examples: typing.List[typing.Dict] = []
+
+    @staticmethod
+    def new_record(example_name: str) -> typing.Dict:
+        """ record of the stage times and counters of one example """
+        return {"example": example_name, "stages": {}, "counters": {}, "events": []}
+
+    @staticmethod
+    @contextlib.contextmanager
+    def stage(name: str, record: typing.Optional[typing.Dict] = None) -> typing.Iterator[None]:
+        """ measure the wall time of the enclosed code as stage name, of the example of record if given """
+        if not Profiler.enabled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter_ns() - start
+            # chrome trace event format, times in microseconds
+            event = {"name": name, "ph": "X", "ts": start / 1000, "dur": duration / 1000, "pid": os.getpid(), "tid": 0, "args": {}}
+            if record is None:
+                Profiler.events.append(event)
+            else:
+                event["args"]["example"] = record["example"]
+                record["events"].append(event)
+                record["stages"][name] = record["stages"].get(name, 0) + duration / 1e9
+
+    @staticmethod
+    def iterate(iterable: typing.Iterable, name: str) -> typing.Iterable:
+        """ measure the time of taking each item of a lazy iterable as stage name, e.g. reading examples while drawing """
+        if not Profiler.enabled:
+            return iterable
+        return Profiler.iterate_items(iter(iterable), name)
+
+    @staticmethod
+    def iterate_items(iterator: typing.Iterator, name: str) -> typing.Iterator:
+        while True:
+            with Profiler.stage(name):
+                item = next(iterator, StopIteration)
+            if item is StopIteration:
+                return
+            yield item
+
+    @staticmethod
+    def add_example(record: typing.Dict) -> None:
+        """ add record of an example, possibly measured in another process """
+        Profiler.events.extend(record.pop("events"))
+        record["seconds"] = sum(record["stages"].values())
+        Profiler.examples.append(record)
+
+    @staticmethod
+    def get_summary(top: int = 10) -> typing.Dict:
+        """ total time per stage, total counters and the slowest examples """
+        stages: typing.Dict[str, float] = {}
+        for event in Profiler.events:
+            stages[event["name"]] = stages.get(event["name"], 0) + event["dur"] / 1e6
+        counters: typing.Dict[str, int] = {}
+        for record in Profiler.examples:
+            for counter, value in record["counters"].items():
+                counters[counter] = counters.get(counter, 0) + value
+        return {
+            "stages": stages,
+            "counters": counters,
+            "examples": len(Profiler.examples),
+            "slowest": sorted(Profiler.examples, key=lambda record: record["seconds"], reverse=True)[:top],
+        }
+
+    @staticmethod
+    def get_report(top: int = 10) -> str:
+        """ human readable summary """
+        summary = Profiler.get_summary(top)
+        lines = ["stages:"]
+        for stage, seconds in sorted(summary["stages"].items(), key=lambda item: item[1], reverse=True):
+            lines.append("    " + stage.ljust(12) + "{:9.3f}s".format(seconds))
+        lines.append("counters:")
+        for counter, value in sorted(summary["counters"].items()):
+            lines.append("    " + counter.ljust(12) + str(value).rjust(10))
+        lines.append("slowest " + str(len(summary["slowest"])) + " of " + str(summary["examples"]) + " drawn examples:")
+        for record in summary["slowest"]:
+            lines.append("    " + "{:9.3f}s  ".format(record["seconds"]) + record["example"])
+        return "\n".join(lines)
+
+    @staticmethod
+    def write_json(file_name: str = "profile.json", chrome: bool = False, top: int = 10) -> None:
+        """ write summary plus all examples, or with chrome a trace for chrome://tracing / perfetto """
+        with open(file_name, "w") as outfile:
+            if chrome:
+                json.dump({"traceEvents": Profiler.events, "displayTimeUnit": "ms"}, outfile)
+            else:
+                summary = Profiler.get_summary(top)
+                summary["all_examples"] = Profiler.examples
+                json.dump(summary, outfile, indent=4, ensure_ascii=False)
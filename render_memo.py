@@ -0,0 +1,44 @@
+# pylint: disable=missing-module-docstring
+
+import typing
+import json
+import drawing
+import tagging
+
+
+class RenderMemo:
+    """ shares one drawing between all examples with the same profile, see Drawing.get_profile() """
+    files: typing.Dict[str, str]
+    inputs: typing.Dict[str, typing.Tuple[typing.List[str], typing.List[str]]]
+    index: typing.Dict[str, typing.Dict]
+
+    def __init__(self: 'RenderMemo') -> 'RenderMemo':
+        # svg file name by profile
+        self.files = {}
+        # settings read and assets used by svg file name, known once drawn
+        self.inputs = {}
+        # svg file name and way names by example name
+        self.index = {}
+
+    def add(self: 'RenderMemo', example: tagging.Example) -> typing.Tuple[drawing.Drawing, bool]:
+        """ get drawing of example named after its profile, True if the profile is new, i.e. it has to be drawn """
+        d_file = drawing.Drawing()
+        d_file.add_group(example, example_label=False)
+        profile = d_file.get_profile()
+        is_new = profile not in self.files
+        if is_new:
+            self.files[profile] = "svg/profile_" + profile[:16] + ".svg"
+        d_file.file_name = self.files[profile]
+        self.add_to_index(example, d_file.file_name)
+        return d_file, is_new
+
+    def add_to_index(self: 'RenderMemo', example: tagging.Example, file_name: str) -> None:
+        self.index[example.name] = {"file": file_name, "ways": [tag_group.name for tag_group in example]}
+
+    def get_unique_count(self: 'RenderMemo') -> int:
+        return len(set(entry["file"] for entry in self.index.values()))
+
+    def save_index(self: 'RenderMemo', file_name: str = "render_index.json") -> None:
+        """ write which svg file each example and its ways are drawn in """
+        with open(file_name, "w") as outfile:
+            json.dump(self.index, outfile, sort_keys=True, indent=4, ensure_ascii=False)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+
+""" persistent store of drawn svg files: payloads appended to <prefix>.blob, each stored once,
+and a sorted index <prefix>.idx by way id and example name, read memory-mapped without loading the store """
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import typing
+
+MAGIC = b"CWSI"
+VERSION = 1
+# magic, version, number of entries of the way, name and payload tables
+HEADER = struct.Struct("<4sIQQQ")
+# key, offset and length of the payload in the blob file
+ENTRY = struct.Struct("<QQI")
+# digest of the payload, offset and length in the blob file
+PAYLOAD = struct.Struct("<16sQI")
+
+
+def get_name_key(example_name: str) -> int:
+    """ 64 bit hash of an example name, key of the name table """
+    return int.from_bytes(hashlib.sha256(example_name.encode("utf-8")).digest()[:8], "little")
+
+
+class RenderStore:
+    """ adds drawings to a store, on save() the whole index is written again, the blob file is only appended to """
+    prefix: str
+    # offset and length of payloads by way id, name key and digest
+    ways: typing.Dict[int, typing.Tuple[int, int]]
+    names: typing.Dict[int, typing.Tuple[int, int]]
+    payloads: typing.Dict[bytes, typing.Tuple[int, int]]
+
+    def __init__(self: 'RenderStore', prefix: str = "render_store") -> 'RenderStore':
+        # entries of an existing store are kept, adding an example again replaces its entry
+        self.prefix = prefix
+        self.ways = {}
+        self.names = {}
+        self.payloads = {}
+        if os.path.exists(prefix + ".idx"):
+            with RenderStoreReader(prefix) as reader:
+                self.ways = dict(reader.get_table(0, ENTRY))
+                self.names = dict(reader.get_table(1, ENTRY))
+                self.payloads = dict(reader.get_table(2, PAYLOAD))
+        self.blob = open(prefix + ".blob", "ab")
+        self.added_bytes = 0
+
+    def add(self: 'RenderStore', example_name: str, svg: bytes, way_id: typing.Optional[int] = None) -> None:
+        """ store the svg of an example, also found by way_id if given """
+        digest = hashlib.sha256(svg).digest()[:16]
+        location = self.payloads.get(digest)
+        if location is None:
+            location = (self.blob.tell(), len(svg))
+            self.blob.write(svg)
+            self.added_bytes += len(svg)
+            self.payloads[digest] = location
+        self.names[get_name_key(example_name)] = location
+        if way_id is not None:
+            self.ways[way_id] = location
+
+    def save(self: 'RenderStore') -> None:
+        """ write the index next to the blob file, readers see either the old or the new index """
+        self.blob.flush()
+        os.fsync(self.blob.fileno())
+        tables = [(self.ways, ENTRY), (self.names, ENTRY), (self.payloads, PAYLOAD)]
+        with open(self.prefix + ".idx.tmp", "wb") as outfile:
+            outfile.write(HEADER.pack(MAGIC, VERSION, len(self.ways), len(self.names), len(self.payloads)))
+            for table, entry in tables:
+                outfile.write(b"".join(entry.pack(key, offset, length) for key, (offset, length) in sorted(table.items())))
+        os.replace(self.prefix + ".idx.tmp", self.prefix + ".idx")
+
+    def close(self: 'RenderStore') -> None:
+        self.blob.close()
+
+
+class RenderStoreReader:
+    """ looks up drawings in a store written by RenderStore, index and blob are memory-mapped """
+    prefix: str
+
+    def __init__(self: 'RenderStoreReader', prefix: str = "render_store") -> 'RenderStoreReader':
+        self.prefix = prefix
+        with open(prefix + ".idx", "rb") as index_file:
+            self.index = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, *self.counts = HEADER.unpack_from(self.index, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(prefix + ".idx is not a render store index of version " + str(VERSION))
+        self.offsets = [HEADER.size]
+        for count, entry in zip(self.counts, [ENTRY, ENTRY, PAYLOAD]):
+            self.offsets.append(self.offsets[-1] + count * entry.size)
+        with open(prefix + ".blob", "rb") as blob_file:
+            # an empty file can not be mapped
+            self.blob = mmap.mmap(blob_file.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(blob_file.fileno()).st_size else b""
+
+    def __enter__(self: 'RenderStoreReader') -> 'RenderStoreReader':
+        return self
+
+    def __exit__(self: 'RenderStoreReader', *args) -> None:
+        self.close()
+
+    def close(self: 'RenderStoreReader') -> None:
+        self.index.close()
+        if isinstance(self.blob, mmap.mmap):
+            self.blob.close()
+
+    def get_table(self: 'RenderStoreReader', table: int, entry: struct.Struct) -> typing.Iterator[typing.Tuple[typing.Any, typing.Tuple[int, int]]]:
+        """ all entries of a table, in order of their keys """
+        for key, offset, length in entry.iter_unpack(self.index[self.offsets[table]:self.offsets[table + 1]]):
+            yield key, (offset, length)
+
+    def find(self: 'RenderStoreReader', table: int, key: int) -> typing.Optional[bytes]:
+        """ binary search of key in a table of ENTRY records """
+        low, high = 0, self.counts[table]
+        while low < high:
+            middle = (low + high) // 2
+            found, offset, length = ENTRY.unpack_from(self.index, self.offsets[table] + middle * ENTRY.size)
+            if found == key:
+                return bytes(self.blob[offset:offset + length])
+            if found < key:
+                low = middle + 1
+            else:
+                high = middle
+        return None
+
+    def get_by_way_id(self: 'RenderStoreReader', way_id: int) -> typing.Optional[bytes]:
+        """ svg of an openstreetmap way, None if not stored """
+        return self.find(0, way_id)
+
+    def get_by_name(self: 'RenderStoreReader', example_name: str) -> typing.Optional[bytes]:
+        """ svg of an example, None if not stored """
+        return self.find(1, get_name_key(example_name))
+
+    def get_counts(self: 'RenderStoreReader') -> typing.Dict[str, int]:
+        return {"ways": self.counts[0], "names": self.counts[1], "payloads": self.counts[2], "blob_bytes": len(self.blob)}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--store", default="render_store", metavar="PREFIX", help="store files without extension (default: render_store)")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--way", type=int, metavar="ID", help="write the svg of this openstreetmap way to stdout")
+    group.add_argument("--name", help="write the svg of this example to stdout")
+    group.add_argument("--stats", action="store_true", help="print the number of entries")
+    args = parser.parse_args()
+
+    with RenderStoreReader(args.store) as reader:
+        if args.stats:
+            print(reader.get_counts())
+            return 0
+        svg = reader.get_by_way_id(args.way) if args.way is not None else reader.get_by_name(args.name)
+    if svg is None:
+        print("not found", file=sys.stderr)
+        return 1
+    sys.stdout.buffer.write(svg)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
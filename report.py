@@ -0,0 +1,147 @@
+# pylint: disable=missing-module-docstring
+
+import typing
+import os
+import re
+import shutil
+import html
+import tagging
+from file_writer import get_temp_file_name
+
+TABLE_HEADER = "<table><td style=\"    vertical-align: top;\">" + "<table border=1 frame=void>\n" + """    <tr>
+        <th>svg</th>
+        <th>Way 1</th>
+        <th>Way 2</th>
+        <th>Way 3</th>
+    </tr>"""
+
+
+def get_highway_category(example: tagging.Example) -> str:
+    """ category of an example by the highway values of its ways, e.g. "road+cycleway+footway" """
+    return "+".join(str(way.get("highway", "none")) for way in example)
+
+
+class ReportPage:
+    """ html page of the report, rows are written to a temporary file as they are added, which replaces file_name on close() """
+    file_name: str
+    category: str
+    number: int
+    rows: int
+
+    def __init__(self: 'ReportPage', file_name: str, category: str = "", number: int = 1) -> 'ReportPage':
+        self.file_name = file_name
+        self.category = category
+        self.number = number
+        self.rows = 0
+        self.temp_file_name = get_temp_file_name(file_name)
+        self.outfile = open(self.temp_file_name, "w")
+        self.outfile.write(TABLE_HEADER)
+
+    def write_row(self: 'ReportPage', row: str) -> None:
+        self.outfile.write(row)
+        self.rows += 1
+
+    def close(self: 'ReportPage', side_file: typing.Optional[str] = None, side_html: str = "") -> None:
+        """ finish the page, next to the table the contents of side_file, else side_html """
+        self.outfile.write("</table>\n")
+        self.outfile.write("<td></td>")
+        self.outfile.write("<td style=\"vertical-align: top;\">")
+        if side_file is not None:
+            with open(side_file) as infile:
+                shutil.copyfileobj(infile, self.outfile)
+        else:
+            self.outfile.write(side_html)
+        self.outfile.write("</td>")
+        self.outfile.write("</td></table>\n")
+        self.outfile.close()
+        os.replace(self.temp_file_name, self.file_name)
+
+
+class ReportWriter:
+    """ writes the html table of drawn examples while they are drawn,
+    in one file or split into pages of page_size rows and/or by category, then with an index page """
+    file_name: str
+    side_file: str
+    page_size: typing.Optional[int]
+    get_category: typing.Optional[typing.Callable[[tagging.Example], str]]
+
+    # open page by category, finished pages, number of pages by category
+    pages: typing.Dict[str, ReportPage]
+    finished: typing.List[ReportPage]
+    page_counts: typing.Dict[str, int]
+
+    def __init__(self: 'ReportWriter', file_name: str = "tagging_generated.html", side_file: str = "tagging.html", page_size: typing.Optional[int] = None, get_category: typing.Optional[typing.Callable[[tagging.Example], str]] = None) -> 'ReportWriter':
+        self.file_name = file_name
+        self.side_file = side_file
+        self.page_size = page_size
+        self.get_category = get_category
+        self.pages = {}
+        self.finished = []
+        self.page_counts = {}
+
+    def is_split(self: 'ReportWriter') -> bool:
+        return self.page_size is not None or self.get_category is not None
+
+    def get_page_file_name(self: 'ReportWriter', category: str, number: int) -> str:
+        base, extension = os.path.splitext(self.file_name)
+        parts = [base]
+        if self.get_category is not None:
+            parts.append(re.sub(r"[^\w.+-]+", "_", category))
+        if self.page_size is not None:
+            parts.append(str(number))
+        return "_".join(parts) + extension
+
+    def get_page(self: 'ReportWriter', category: str) -> ReportPage:
+        page = self.pages.get(category)
+        if page is not None and self.page_size is not None and page.rows >= self.page_size:
+            self.close_page(category)
+            page = None
+        if page is None:
+            if not self.is_split():
+                page = ReportPage(self.file_name)
+            else:
+                number = self.page_counts.get(category, 0) + 1
+                self.page_counts[category] = number
+                page = ReportPage(self.get_page_file_name(category, number), category, number)
+            self.pages[category] = page
+        return page
+
+    def write_row(self: 'ReportWriter', example: tagging.Example, row: str) -> None:
+        category = "" if self.get_category is None else self.get_category(example)
+        self.get_page(category).write_row(row)
+
+    def close_page(self: 'ReportWriter', category: str) -> None:
+        page = self.pages.pop(category)
+        if self.is_split():
+            page.close(side_html="<a href=\"" + os.path.basename(self.file_name) + "\">index</a>")
+        else:
+            page.close(self.side_file)
+        self.finished.append(page)
+
+    def get_index_html(self: 'ReportWriter') -> str:
+        parts = ["<ul>\n"]
+        for page in sorted(self.finished, key=lambda page: (page.category, page.number)):
+            title = page.category if self.page_size is None else (page.category + " " + str(page.number)).strip()
+            parts.append("    <li><a href=\"" + os.path.basename(page.file_name) + "\">" + html.escape(title) + "</a> (" + str(page.rows) + " examples)</li>\n")
+        parts.append("</ul>\n")
+        return "".join(parts)
+
+    def close(self: 'ReportWriter') -> None:
+        """ finish all pages, write the index page if split """
+        if not self.is_split() and not self.pages:
+            # no examples, still write an empty table
+            self.get_page("")
+        for category in list(self.pages):
+            self.close_page(category)
+        if self.is_split():
+            temp_file_name = get_temp_file_name(self.file_name)
+            with open(temp_file_name, "w") as outfile:
+                outfile.write("<table><td style=\"    vertical-align: top;\">")
+                outfile.write(self.get_index_html())
+                outfile.write("<td></td>")
+                outfile.write("<td style=\"vertical-align: top;\">")
+                with open(self.side_file) as infile:
+                    shutil.copyfileobj(infile, outfile)
+                outfile.write("</td>")
+                outfile.write("</td></table>\n")
+            os.replace(temp_file_name, self.file_name)
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+""" local http service drawing the svg of posted ways in memory, without writing to svg/
+
+POST /render with a json list of ways as in tags/*.json, e.g.
+[{"name": "Straße", "direction": "up", "tags": {"highway": "road", "lanes": "2"}}]
+returns the svg, GET /metrics returns cache and latency counters as json """
+
+import argparse
+import collections
+import json
+import sys
+import threading
+import time
+import typing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import settings
+import drawing
+import tagging
+from diagnostics import Diagnostics
+
+
+class RenderService:
+    """ draws examples in memory, keeps the last cache_size svgs by canonical tags and draw settings """
+    cache_size: int
+    cache: typing.OrderedDict[str, str]
+
+    def __init__(self: 'RenderService', cache_size: int = 1000) -> 'RenderService':
+        self.cache_size = cache_size
+        self.cache = collections.OrderedDict()
+        # guards cache and metrics
+        self.lock = threading.Lock()
+        # drawing uses class level state, e.g. settings.Draw, Diagnostics and the parsed sign files, thus one drawing at a time
+        self.render_lock = threading.Lock()
+        self.metrics = {"requests": 0, "hits": 0, "misses": 0, "errors": 0, "seconds": 0.0, "render_seconds": 0.0, "max_seconds": 0.0}
+
+    @staticmethod
+    def make_example(ways: typing.List[typing.Dict]) -> tagging.Example:
+        """ example of posted ways, raises ValueError if they are not shaped like in tags/*.json """
+        if not isinstance(ways, list) or not all(isinstance(way, dict) and isinstance(way.get("tags", {}), dict) for way in ways):
+            raise ValueError("expected a list of ways, each like {\"name\": ..., \"direction\": \"up\", \"tags\": {...}}")
+        for way in ways:
+            for key, value in way.get("tags", {}).items():
+                if not isinstance(value, str):
+                    raise ValueError("tag values must be strings: " + key)
+        return tagging.Example("service", {"ways": ways})
+
+    @staticmethod
+    def get_key(example: tagging.Example) -> str:
+        """ equal for ways with equal names, directions and tags, in any order of tags, and equal draw settings """
+        ways = [[way.name, way.direction, sorted(way.items())] for way in example]
+        return json.dumps([ways, settings.Draw.get_hash()], ensure_ascii=False)
+
+    def render(self: 'RenderService', ways: typing.List[typing.Dict]) -> typing.Tuple[str, bool]:
+        """ svg of the ways and whether it was cached """
+        example = RenderService.make_example(ways)
+        key = RenderService.get_key(example)
+        with self.lock:
+            svg = self.cache.get(key)
+            if svg is not None:
+                self.cache.move_to_end(key)
+                self.metrics["hits"] += 1
+                return svg, True
+
+        with self.render_lock:
+            start = time.perf_counter()
+            # the file name is never written, explicit to not use the class level counter
+            d_file = drawing.Drawing("service.svg")
+            try:
+                d_file.add_group(example, example_label=False)
+                d_file.draw()
+                svg = d_file.get_svg()
+            finally:
+                Diagnostics.take()
+            render_seconds = time.perf_counter() - start
+
+        with self.lock:
+            self.metrics["misses"] += 1
+            self.metrics["render_seconds"] += render_seconds
+            self.cache[key] = svg
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return svg, False
+
+    def add_request(self: 'RenderService', seconds: float, error: bool = False) -> None:
+        with self.lock:
+            self.metrics["requests"] += 1
+            self.metrics["errors"] += error
+            self.metrics["seconds"] += seconds
+            self.metrics["max_seconds"] = max(self.metrics["max_seconds"], seconds)
+
+    def get_metrics(self: 'RenderService') -> typing.Dict:
+        with self.lock:
+            metrics = dict(self.metrics)
+            metrics["cached"] = len(self.cache)
+        lookups = metrics["hits"] + metrics["misses"]
+        metrics["hit_rate"] = metrics["hits"] / lookups if lookups else 0.0
+        metrics["mean_ms"] = metrics["seconds"] / metrics["requests"] * 1000 if metrics["requests"] else 0.0
+        metrics["mean_render_ms"] = metrics["render_seconds"] / metrics["misses"] * 1000 if metrics["misses"] else 0.0
+        return metrics
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    """ http interface of RenderService """
+    service: RenderService
+
+    def send(self: 'RenderHandler', status: int, content_type: str, body: str, headers: typing.Optional[typing.Dict[str, str]] = None) -> None:
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type + "; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self: 'RenderHandler') -> None:
+        if self.path == "/metrics":
+            self.send(200, "application/json", json.dumps(self.service.get_metrics(), indent=4))
+        else:
+            self.send(404, "text/plain", "not found, use POST /render or GET /metrics\n")
+
+    def do_POST(self: 'RenderHandler') -> None:
+        if self.path != "/render":
+            self.send(404, "text/plain", "not found, use POST /render or GET /metrics\n")
+            return
+        start = time.perf_counter()
+        failed = True
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            svg, hit = self.service.render(json.loads(self.rfile.read(length)))
+            failed = False
+        except ValueError as error:
+            self.send(400, "text/plain", str(error) + "\n")
+            return
+        except Exception as error:  # pylint: disable=broad-except
+            # e.g. a missing sign file, answer instead of dropping the connection
+            self.send(500, "text/plain", type(error).__name__ + ": " + str(error) + "\n")
+            return
+        finally:
+            self.service.add_request(time.perf_counter() - start, error=failed)
+        self.send(200, "image/svg+xml", svg, {"X-Cache": "hit" if hit else "miss"})
+
+    def log_message(self: 'RenderHandler', format: str, *args) -> None:  # pylint: disable=redefined-builtin
+        # no line per request, see /metrics
+        pass
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="port to listen on (default: 8000)")
+    parser.add_argument("--cache-size", type=int, default=1000, help="number of svgs kept in memory (default: 1000)")
+    args = parser.parse_args()
+
+    # warnings are of no use to clients, they are discarded after each drawing
+    Diagnostics.verbosity = Diagnostics.QUIET
+    settings.Draw.set_default_settings()
+    # compile before serving, not in concurrent requests
+    settings.Draw.get_hash()
+
+    RenderHandler.service = RenderService(args.cache_size)
+    server = ThreadingHTTPServer((args.host, args.port), RenderHandler)
+    print("serving on http://" + args.host + ":" + str(args.port) + "/render, stop with ctrl+c")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
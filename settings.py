@@ -2,7 +2,39 @@
 
 import typing
 import json
+import collections
+import hashlib
+import keyword
 from scoping import scoping
+from diagnostics import Diagnostics
+
+
+def compile_section(name: str, section: typing.Dict, references: typing.Dict[str, float], prev: str = "") -> typing.NamedTuple:
+    """ convert a dict of settings into an immutable named tuple, resolve names of line widths to their value,
+    raises ValueError for keys which can not be attribute names, prev is the path of the section, e.g. strasse:linie """
+    fields = {}
+    for key, value in section.items():
+        if not key.isidentifier() or keyword.iskeyword(key) or key.startswith("_"):
+            raise ValueError("invalid name of draw setting " + repr(prev + ":" + key if prev else key) + ", use letters, digits and _, not starting with a digit or _")
+        if type(value) is dict:
+            value = compile_section(key, value, references, prev + ":" + key if prev else key)
+        elif isinstance(value, str) and value in references:
+            value = references[value]
+        fields[key] = value
+    return collections.namedtuple(name, fields.keys())(**fields)
+
+
+class AccessRecorder:
+    """ wraps compiled settings to record which top level settings are read """
+    __slots__ = ("compiled", "keys")
+
+    def __init__(self: 'AccessRecorder', compiled: typing.NamedTuple, keys: typing.Set[str]) -> 'AccessRecorder':
+        self.compiled = compiled
+        self.keys = keys
+
+    def __getattr__(self: 'AccessRecorder', key: str):
+        self.keys.add(key)
+        return getattr(self.compiled, key)
 
 
 class Draw:
@@ -10,6 +42,12 @@ class Draw:
 
     settings_data: typing.Dict
     is_initialized: bool = False
+    # top level keys read via __getitem__ or compiled() while tracking, None if not tracking
+    accessed_keys: typing.Optional[typing.Set[str]] = None
+    compiled_data: typing.Optional[typing.NamedTuple] = None
+    compiled_hash: typing.Optional[str] = None
+    # compiled settings and their hash by pixel_pro_meter, see set_scale()
+    scaled: typing.Dict[typing.Optional[float], typing.Tuple[typing.NamedTuple, str]] = {}
 
     @staticmethod
     def init() -> 'Draw':
@@ -23,8 +61,55 @@ class Draw:
             #print(json.dumps(settings_data, sort_keys = True, indent = 4, ensure_ascii=False))
 
         Draw.check_values(Draw.settings_data)
+        Draw.compiled_data = None
+        Draw.compiled_hash = None
+        Draw.scaled = {}
         Draw.is_initialized = True
 
+    @staticmethod
+    def reload() -> None:
+        """ read and check draw_settings.json again, e.g. after it was edited, missing values are set to defaults """
+        Draw.is_initialized = False
+        Draw.set_default_settings()
+
+    @staticmethod
+    def compile(settings_data: typing.Dict) -> typing.NamedTuple:
+        """ immutable settings with attribute access, line width names resolved and pixel sizes precomputed """
+        references = {key: value for key, value in settings_data["strasse"]["linie"].items() if isinstance(value, (int, float))}
+        pixel_pro_meter = settings_data["pixel_pro_meter"]
+        padding_pixel = 0.1 * pixel_pro_meter
+
+        fields = {key: value for key, value in settings_data.items()}
+        fields.update(
+            draw_height_pixel=settings_data["draw_height_meter"] * pixel_pro_meter,
+            padding_pixel=padding_pixel,
+            label_height_pixel=1 * pixel_pro_meter - padding_pixel,
+            font_size_pixel=0.5 * pixel_pro_meter,
+            schild_breite_pixel=pixel_pro_meter * settings_data["schild"]["groessenfaktor"] * settings_data["schild"]["breite"]["gross"],
+        )
+        return compile_section("DrawSettings", fields, references)
+
+    @staticmethod
+    def compiled() -> typing.NamedTuple:
+        """ get compiled settings, fetch once per function and use attribute access, e.g. compiled().strasse.spurbreite """
+        Draw.init()
+        if Draw.compiled_data is None:
+            Draw.compiled_data = Draw.compile(Draw.settings_data)
+        if Draw.accessed_keys is not None:
+            return AccessRecorder(Draw.compiled_data, Draw.accessed_keys)
+        return Draw.compiled_data
+
+    @staticmethod
+    def set_scale(pixel_pro_meter: typing.Optional[float] = None) -> None:
+        """ draw with another pixel_pro_meter than the one of draw_settings.json, None to draw with that again,
+        settings are compiled once per scale """
+        Draw.init()
+        if pixel_pro_meter not in Draw.scaled:
+            settings_data = Draw.settings_data if pixel_pro_meter is None else dict(Draw.settings_data, pixel_pro_meter=pixel_pro_meter)
+            compiled = Draw.compile(settings_data)
+            Draw.scaled[pixel_pro_meter] = (compiled, hashlib.sha256(repr(compiled).encode("utf-8")).hexdigest())
+        Draw.compiled_data, Draw.compiled_hash = Draw.scaled[pixel_pro_meter]
+
     @staticmethod
     def check_values(dictionary, prev=""):
         for key, value in dictionary.items():
@@ -34,19 +119,42 @@ class Draw:
                 else:
                     Draw.check_values(value, prev + ":" + key)
             if value == "?":
-                print("warning: unknown value in DrawSettings:", prev + ":" + key, "=", value)
+                Diagnostics.warn("unknown_setting", "warning: unknown value in DrawSettings: " + prev + ":" + key + " = " + value)
+
+    @staticmethod
+    def get_hash() -> str:
+        """ hash of all compiled settings """
+        if Draw.compiled_hash is None:
+            Draw.compiled()
+            Draw.compiled_hash = hashlib.sha256(repr(Draw.compiled_data).encode("utf-8")).hexdigest()
+        return Draw.compiled_hash
 
     @staticmethod
     def __getitem__(item):
         Draw.init()
+        if Draw.accessed_keys is not None:
+            Draw.accessed_keys.add(item)
         return Draw.settings_data[item]
 
+    @staticmethod
+    def start_tracking() -> None:
+        """ start recording which top level settings are read """
+        Draw.accessed_keys = set()
+
+    @staticmethod
+    def stop_tracking() -> typing.List[str]:
+        """ stop recording, return the top level settings read since start_tracking() """
+        keys = sorted(Draw.accessed_keys or [])
+        Draw.accessed_keys = None
+        return keys
+
     @staticmethod
     def write_draw_settings() -> None:
         Draw.init()
         with open("draw_settings.json", "w") as outfile:
             json.dump(Draw.settings_data, outfile, sort_keys=True, indent=4)
-        Draw.is_initialized = False
+        # is_initialized is kept: the written file equals settings_data, reading and checking it again
+        # would only warn about its unknown values a second time, doubling their counts in the summary
 
     @staticmethod
     def set_default_settings() -> None:
@@ -174,6 +282,10 @@ class Draw:
 
         pixel_pro_meter = Draw.settings_data.setdefault("pixel_pro_meter", 160)
         draw_height_meter = Draw.settings_data.setdefault("draw_height_meter", 10)
+        # gestrichelte linien als ein rechteck mit muster zeichnen, statt einem rechteck je strich
+        gestrichelt_als_muster = Draw.settings_data.setdefault("gestrichelt_als_muster", True)
+        # benachbarte gleichfarbige flaechen als ein rechteck zeichnen, linien darueber
+        flaechen_zusammenfassen = Draw.settings_data.setdefault("flaechen_zusammenfassen", True)
 
         schild = Draw.settings_data.setdefault("schild", {})
         with scoping():
@@ -202,3 +314,8 @@ class Draw:
             with scoping():
                 breite.setdefault("min", 0)
                 breite.setdefault("max", 1.5)  # quelle?
+
+        # defaults changed the settings, compile again on next use
+        Draw.compiled_data = None
+        Draw.compiled_hash = None
+        Draw.scaled = {}
@@ -0,0 +1,129 @@
+# pylint: disable=missing-module-docstring
+
+import typing
+import copy
+import io
+import os
+from xml.etree import ElementTree
+
+SVG_NAMESPACE = "http://www.w3.org/2000/svg"
+XLINK_NAMESPACE = "http://www.w3.org/1999/xlink"
+
+ElementTree.register_namespace("", SVG_NAMESPACE)
+ElementTree.register_namespace("xlink", XLINK_NAMESPACE)
+
+
+class SpriteShard:
+    """ one sprite sheet file, its symbols and the definitions they share """
+    file_name: str
+    root: ElementTree.Element
+    defs: ElementTree.Element
+    # id of each dash pattern by its content, ids of defined signs
+    patterns: typing.Dict[bytes, ElementTree.Element]
+    signs: typing.Set[str]
+    symbols: int
+
+    def __init__(self: 'SpriteShard', file_name: str) -> 'SpriteShard':
+        self.file_name = file_name
+        self.root = ElementTree.Element("{" + SVG_NAMESPACE + "}svg", {"version": "1.1"})
+        self.defs = ElementTree.SubElement(self.root, "{" + SVG_NAMESPACE + "}defs")
+        self.patterns = {}
+        self.signs = set()
+        self.symbols = 0
+
+    @staticmethod
+    def get_pattern_key(pattern: ElementTree.Element) -> bytes:
+        """ content of a dash pattern, without its id and width, which is the width of the drawing it was made for """
+        pattern = copy.deepcopy(pattern)
+        for elem in pattern.iter():
+            elem.attrib.pop("width", None)
+        pattern.attrib.pop("id")
+        return ElementTree.tostring(pattern)
+
+    def add_pattern(self: 'SpriteShard', pattern: ElementTree.Element) -> str:
+        """ define pattern if no equal pattern is defined yet, return the id to use instead of its own """
+        key = SpriteShard.get_pattern_key(pattern)
+        defined = self.patterns.get(key)
+        if defined is None:
+            defined = copy.deepcopy(pattern)
+            defined.set("id", "strichmuster" + str(len(self.patterns)))
+            self.defs.append(defined)
+            self.patterns[key] = defined
+        elif float(pattern.get("width")) > float(defined.get("width")):
+            # patterns are horizontally uniform, one tile has to span the widest drawing
+            for elem in defined.iter():
+                elem.set("width", pattern.get("width"))
+        return defined.get("id")
+
+    def add(self: 'SpriteShard', symbol_id: str, svg_file: str, data: typing.Optional[bytes] = None) -> str:
+        """ add the drawing of an svg file written by Drawing.save() as symbol, return its view box,
+        with data the contents of the file, which may not be written yet """
+        root = ElementTree.parse(svg_file if data is None else io.BytesIO(data)).getroot()
+        view_box = "0 0 " + root.get("width") + " " + root.get("height")
+        symbol = ElementTree.SubElement(self.root, "{" + SVG_NAMESPACE + "}symbol", {"id": symbol_id, "viewBox": view_box})
+        fills: typing.Dict[str, str] = {}
+        for child in root:
+            if child.tag != "{" + SVG_NAMESPACE + "}defs":
+                symbol.append(child)
+                continue
+            for definition in child:
+                if definition.tag == "{" + SVG_NAMESPACE + "}pattern":
+                    fills["url(#" + definition.get("id") + ")"] = "url(#" + self.add_pattern(definition) + ")"
+                elif definition.get("id") not in self.signs:
+                    # traffic signs, with equal ids for equal signs
+                    self.signs.add(definition.get("id"))
+                    self.defs.append(definition)
+        for elem in symbol.iter():
+            if elem.get("fill") in fills:
+                elem.set("fill", fills[elem.get("fill")])
+        self.symbols += 1
+        return view_box
+
+    def save(self: 'SpriteShard') -> None:
+        ElementTree.ElementTree(self.root).write(self.file_name, encoding="utf-8", xml_declaration=True)
+
+
+class SpriteSheet:
+    """ drawings packed into one svg file (or shards of shard_size drawings) as symbols,
+    addressable as e.g. sprite.svg#strasse2, signs and dash patterns are defined once per file """
+    file_name: str
+    shard_size: typing.Optional[int]
+    shard: typing.Optional[SpriteShard]
+    shards: int
+    # file name and view box of each added symbol
+    locations: typing.Dict[str, typing.Tuple[str, str]]
+
+    def __init__(self: 'SpriteSheet', file_name: str = "sprite.svg", shard_size: typing.Optional[int] = None) -> 'SpriteSheet':
+        self.file_name = file_name
+        self.shard_size = shard_size
+        self.shard = None
+        self.shards = 0
+        self.locations = {}
+
+    @staticmethod
+    def get_symbol_id(svg_file: str) -> str:
+        """ id of the symbol of an svg file, e.g. strasse2 for svg/strasse2.svg """
+        return os.path.splitext(os.path.basename(svg_file))[0]
+
+    def add(self: 'SpriteSheet', svg_file: str, data: typing.Optional[bytes] = None) -> typing.Tuple[str, str]:
+        """ add an svg file written by Drawing.save() once, return the reference to its symbol and its view box,
+        with data the contents of the file, which may not be written yet """
+        symbol_id = SpriteSheet.get_symbol_id(svg_file)
+        if symbol_id not in self.locations:
+            if self.shard is not None and self.shard_size is not None and self.shard.symbols >= self.shard_size:
+                self.shard.save()
+                self.shard = None
+            if self.shard is None:
+                file_name = self.file_name
+                if self.shard_size is not None:
+                    base, extension = os.path.splitext(self.file_name)
+                    file_name = base + "_" + str(self.shards) + extension
+                self.shard = SpriteShard(file_name)
+                self.shards += 1
+            view_box = self.shard.add(symbol_id, svg_file, data)
+            self.locations[symbol_id] = (self.shard.file_name + "#" + symbol_id, view_box)
+        return self.locations[symbol_id]
+
+    def save(self: 'SpriteSheet') -> None:
+        if self.shard is not None:
+            self.shard.save()
@@ -1,4 +1,6 @@
 import typing
+import fnmatch
+import heapq
 import json
 import os
 
@@ -55,18 +57,145 @@ def printdict(d: dict, indent: int = 0):
             print(indent * " " * 4, key, ":", value, type(value))
 
 
-class Tags(typing.List[Example]):
-    def __init__(self: 'Tags'):
-        filenames = next(os.walk("tags"), (None, None, []))[2]  # [] if no file
+class IndexEntry(typing.NamedTuple):
+    """ position of an example in its tags file, to load it without reading the other examples """
+    name: str
+    sort_weight: float
+    file_name: str
+    offset: int  # in bytes
+    length: int  # in bytes
+
+
+def index_tags_file(file_name: str) -> typing.List[IndexEntry]:
+    """ entries of the examples of a tags file, in file order """
+    with open(file_name, "rb") as infile:
+        data = infile.read()
+    text = data.decode("utf-8")
+    decoder = json.JSONDecoder()
+    whitespace = " \t\n\r"
+
+    entries: typing.Dict[str, IndexEntry] = {}
+    # byte offset of char position pos, text before pos is encoded only once
+    pos = 0
+    byte_pos = 0
+
+    def skip(index: int, expected: str = "") -> int:
+        while index < len(text) and text[index] in whitespace:
+            index += 1
+        if expected:
+            if index >= len(text) or text[index] not in expected:
+                raise ValueError(file_name + ": expected one of " + repr(expected) + " at char " + str(index))
+            index += 1
+        return index
+
+    index = skip(skip(0, "{"))
+    if text.startswith("}", index):
+        return []
+    while True:
+        name, index = decoder.raw_decode(text, index)
+        start = skip(index, ":")
+        start = skip(start)
+        example_data, end = decoder.raw_decode(text, start)
+
+        byte_pos += len(text[pos:start].encode("utf-8"))
+        length = len(text[start:end].encode("utf-8"))
+        pos = end
+        byte_pos += length
+        # like json.load, a repeated name keeps its first position and its last value
+        entries[name] = IndexEntry(name, example_data.get("sort_weight", 0), file_name, byte_pos - length, length)
+
+        index = skip(end, ",}")
+        if text[index - 1] == "}":
+            return list(entries.values())
+        index = skip(index)
+
+
+class TagIndex:
+    """ examples of the tags files of a directory by name, sort_weight and position,
+    unchanged files are not read again if the index is saved to index_file """
+    directory: str
+    index_file: typing.Optional[str]
+
+    # entries by tags file, in the order of os.walk
+    files: typing.Dict[str, typing.List[IndexEntry]]
+
+    def __init__(self: 'TagIndex', directory: str = "tags", index_file: typing.Optional[str] = None) -> 'TagIndex':
+        self.directory = directory
+        self.index_file = index_file
+        self.files = {}
+
+        saved = {}
+        if index_file is not None and os.path.isfile(index_file):
+            with open(index_file) as infile:
+                saved = json.load(infile)
+
+        filenames = next(os.walk(directory), (None, None, []))[2]  # [] if no file
         for filename in filenames:
             if not filename.endswith(".json"):
                 # only read json files
                 continue
-            with open("tags" + os.sep + filename) as json_file:
-                json_data = json.load(json_file)
-            # print(json.dumps(tag_data, sort_keys = True, indent = 4, ensure_ascii=False))
-            # printdict(tag_data)
-            for example_name, example_data in json_data.items():
-                self.append(Example(example_name, example_data))
-        # sort by sort_weight
-        self.sort(key=lambda x: x.sort_weight)
+            file_name = directory + os.sep + filename
+            stat = os.stat(file_name)
+            saved_file = saved.get(file_name)
+            if saved_file is not None and saved_file["mtime_ns"] == stat.st_mtime_ns and saved_file["size"] == stat.st_size:
+                self.files[file_name] = [IndexEntry(*entry) for entry in saved_file["entries"]]
+            else:
+                self.files[file_name] = index_tags_file(file_name)
+            saved[file_name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "entries": self.files[file_name]}
+
+        if index_file is not None:
+            # drop removed files
+            saved = {file_name: saved[file_name] for file_name in self.files}
+            with open(index_file, "w") as outfile:
+                json.dump(saved, outfile, ensure_ascii=False)
+
+    def select(self: 'TagIndex', names: typing.Optional[typing.List[str]] = None, files: typing.Optional[typing.List[str]] = None) -> 'TagCorpus':
+        """ examples whose name matches one of the glob patterns names and whose file is in files,
+        e.g. "strasse2*" or "tags.json", None for all """
+        selected = {}
+        for file_name, entries in self.files.items():
+            if files is not None and file_name not in files and os.path.basename(file_name) not in files:
+                continue
+            if names is not None:
+                entries = [entry for entry in entries if any(fnmatch.fnmatchcase(entry.name, pattern) for pattern in names)]
+            selected[file_name] = entries
+        return TagCorpus(selected)
+
+    def get_names(self: 'TagIndex') -> typing.Set[str]:
+        """ names of the examples of all files, also of those not selected """
+        return {entry.name for entries in self.files.values() for entry in entries}
+
+
+class TagCorpus:
+    """ examples of an index, loaded one at a time in order of sort_weight while iterating """
+    files: typing.Dict[str, typing.List[IndexEntry]]
+
+    def __init__(self: 'TagCorpus', files: typing.Dict[str, typing.List[IndexEntry]]) -> 'TagCorpus':
+        self.files = files
+
+    def __len__(self: 'TagCorpus') -> int:
+        return sum(len(entries) for entries in self.files.values())
+
+    def get_entries(self: 'TagCorpus') -> typing.Iterator[IndexEntry]:
+        """ entries of all files in order of sort_weight, equal weights in file order """
+        # merge is stable, the same order as sorting all examples read file by file
+        return heapq.merge(*(sorted(entries, key=lambda entry: entry.sort_weight) for entries in self.files.values()), key=lambda entry: entry.sort_weight)
+
+    def __iter__(self: 'TagCorpus') -> typing.Iterator[Example]:
+        open_files: typing.Dict[str, typing.BinaryIO] = {}
+        try:
+            for entry in self.get_entries():
+                infile = open_files.get(entry.file_name)
+                if infile is None:
+                    infile = open_files[entry.file_name] = open(entry.file_name, "rb")
+                infile.seek(entry.offset)
+                yield Example(entry.name, json.loads(infile.read(entry.length)))
+        finally:
+            for infile in open_files.values():
+                infile.close()
+
+
+class Tags(typing.List[Example]):
+    """ all examples of the tags files of a directory, sorted by sort_weight """
+    def __init__(self: 'Tags', directory: str = "tags"):
+        self.extend(TagIndex(directory).select())
@@ -0,0 +1,7 @@
+# pylint: disable=missing-module-docstring
+
+import pathlib
+import sys
+
+# the modules are at the top level of the repository, not in a package
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
@@ -0,0 +1,83 @@
+# pylint: disable=missing-module-docstring
+
+import pathlib
+import threading
+import types
+import pytest
+import file_writer
+from file_writer import FileWriter, write_atomic
+
+
+@pytest.fixture
+def blocked_writes(monkeypatch: pytest.MonkeyPatch) -> types.SimpleNamespace:
+    """ each write signals started and waits until it is allowed """
+    writes = types.SimpleNamespace(started=threading.Semaphore(0), allowed=threading.Semaphore(0))
+
+    def write(file_name: str, data: bytes) -> None:
+        writes.started.release()
+        writes.allowed.acquire(timeout=10)
+        write_atomic(file_name, data)
+
+    monkeypatch.setattr(file_writer, "write_atomic", write)
+    return writes
+
+
+def test_put_waits_for_full_queue(tmp_path: pathlib.Path, blocked_writes: types.SimpleNamespace):
+    writer = FileWriter(threads=1, queue_size=1)
+    writer.put(str(tmp_path / "0.svg"), b"0")
+    # taken from the queue by the thread, which is writing it
+    assert blocked_writes.started.acquire(timeout=10)
+    writer.put(str(tmp_path / "1.svg"), b"1")
+    done = threading.Event()
+
+    def put() -> None:
+        writer.put(str(tmp_path / "2.svg"), b"2")
+        done.set()
+
+    putter = threading.Thread(target=put)
+    putter.start()
+    assert not done.wait(0.2)
+    # queued files can be read before they are written
+    assert writer.read(str(tmp_path / "1.svg")) == b"1"
+    blocked_writes.allowed.release(3)
+    assert done.wait(10)
+    putter.join()
+    writer.close()
+    assert [(tmp_path / (str(number) + ".svg")).read_bytes() for number in range(3)] == [b"0", b"1", b"2"]
+    assert writer.stats["files"] == 3
+    assert writer.stats["wait_seconds"] >= 0.2
+    assert writer.pending == {}
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_without_threads(tmp_path: pathlib.Path):
+    writer = FileWriter(threads=0)
+    writer.put(str(tmp_path / "a.svg"), b"a")
+    assert (tmp_path / "a.svg").read_bytes() == b"a"
+    assert writer.read(str(tmp_path / "a.svg")) == b"a"
+    writer.close()
+    assert "wrote 1 files" in writer.get_report()
+
+
+def test_newer_version_pending(tmp_path: pathlib.Path, blocked_writes: types.SimpleNamespace):
+    # the first write of a file does not remove the newer queued version from pending
+    writer = FileWriter(threads=1, queue_size=2)
+    writer.put(str(tmp_path / "a.svg"), b"old")
+    assert blocked_writes.started.acquire(timeout=10)
+    writer.put(str(tmp_path / "a.svg"), b"new")
+    blocked_writes.allowed.release()
+    # the old version is written, the new one is not yet
+    assert blocked_writes.started.acquire(timeout=10)
+    assert (tmp_path / "a.svg").read_bytes() == b"old"
+    assert writer.read(str(tmp_path / "a.svg")) == b"new"
+    blocked_writes.allowed.release()
+    writer.close()
+    assert (tmp_path / "a.svg").read_bytes() == b"new"
+
+
+def test_error(tmp_path: pathlib.Path):
+    writer = FileWriter(threads=2)
+    writer.put(str(tmp_path / "missing" / "a.svg"), b"a")
+    with pytest.raises(OSError):
+        writer.close()
+    assert list(tmp_path.rglob("*.tmp")) == []
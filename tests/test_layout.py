@@ -0,0 +1,111 @@
+# pylint: disable=missing-module-docstring
+
+import pathlib
+import pytest
+import settings
+import drawing
+from diagnostics import Diagnostics
+from layout import WayLayout, Span, coalesce
+from way import Way
+from way_element import WayElement
+
+REPOSITORY = pathlib.Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope="module")
+def draw_settings():
+    """ settings of the repository at 1 pixel per meter, sizes of elements in meters are their sizes in pixels,
+    loaded once, setting the defaults is slow below the deep stack of pytest """
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.chdir(REPOSITORY)
+        monkeypatch.setattr(Diagnostics, "verbosity", Diagnostics.QUIET)
+        settings.Draw.reload()
+        settings.Draw.set_scale(1)
+        yield settings.Draw.settings_data
+        settings.Draw.set_scale(None)
+        Diagnostics.take()
+
+
+def set_setting(key: str, value) -> None:
+    settings.Draw.settings_data[key] = value
+    settings.Draw.scaled = {}
+    settings.Draw.set_scale(1)
+
+
+def get_spans(way_elems):
+    return coalesce(WayLayout(way_elems), way_elems, settings.Draw.compiled().draw_height_pixel)
+
+
+def test_adjacent_same_colour(draw_settings):
+    spans = get_spans([WayElement(2, 12, "grey"), WayElement(3, 12, "grey"), WayElement(1, 12, "green")])
+    assert spans == [Span(0, 2, 0, 5, 12, "grey", []), Span(2, 1, 5, 1, 12, "green", [])]
+
+
+def test_same_colour_other_height(draw_settings):
+    # a curb is lower than the drawing, it is not merged with the road
+    spans = get_spans([WayElement(2, 12, "grey"), WayElement(1, 1, "grey")])
+    assert [(span.first, span.count) for span in spans] == [(0, 1), (1, 1)]
+
+
+def test_line_between_same_colour(draw_settings):
+    spans = get_spans([WayElement(3, 12, "grey"), WayElement(1, 12, "white"), WayElement(3, 12, "grey")])
+    assert spans == [Span(0, 3, 0, 7, 12, "grey", [1])]
+
+
+def test_dashed_next_to_solid(draw_settings):
+    # the gaps of a dashed line show its background, the road it is drawn on
+    dashed = WayElement(1, 2, "white", 4, "grey")
+    spans = get_spans([WayElement(3, 12, "grey"), dashed, WayElement(3, 12, "grey"), WayElement(2, 12, "green")])
+    assert spans == [Span(0, 3, 0, 7, 12, "grey", [1]), Span(3, 1, 7, 2, 12, "green", [])]
+
+
+def test_dashed_other_background(draw_settings):
+    # a dashed line with a background of its own between two roads is an overlay with its background
+    spans = get_spans([WayElement(3, 12, "grey"), WayElement(1, 2, "white", 4, "black"), WayElement(3, 12, "grey")])
+    assert spans == [Span(0, 3, 0, 7, 12, "grey", [1])]
+
+
+def test_single_dashed(draw_settings):
+    # drawn as before as a single pattern, without overlays
+    spans = get_spans([WayElement(1, 2, "white", 4, "black"), WayElement(3, 12, "grey")])
+    assert spans == [Span(0, 1, 0, 1, 12, "black", []), Span(1, 1, 1, 3, 12, "grey", [])]
+
+
+def test_dash_pattern_gap(draw_settings):
+    elem = WayElement(1, 2, "white", 4, "grey")
+    layout = WayLayout([elem])
+    assert layout.is_dashed(0)
+    drawn = drawing.Drawing("dashed.svg")
+    drawn.ways = []
+    drawn.svg_obj = drawing.svgwrite.Drawing(size=(10, 12))
+    drawn.dash_patterns = {}
+    drawn.draw_element(elem, layout, 0, 0, 0)
+    pattern = drawn.svg_obj.defs.elements[0]
+    # half a dash, the gap of distance in the background colour, half a dash
+    assert pattern["height"] == 2 + 4
+    assert [(rect["y"], rect["height"], rect["fill"]) for rect in pattern.elements] == [(0, 1, "white"), (1, 4, "grey"), (5, 1, "white")]
+
+
+def test_draw_coalesced(draw_settings):
+    way = Way("road", {"highway": "road", "lanes": "2"}, 0, 1)
+    set_setting("flaechen_zusammenfassen", False)
+    separate = drawing.Drawing("separate.svg")
+    separate.ways = [way]
+    separate.draw()
+    set_setting("flaechen_zusammenfassen", True)
+    coalesced = drawing.Drawing("coalesced.svg")
+    coalesced.ways = [way]
+    coalesced.draw()
+    assert coalesced.count_elements("rect") < separate.count_elements("rect")
+    # each span of the road is one rect, the lines on it are drawn on top
+    layout = way.get_layout()
+    spans = coalesce(layout, way.way_elems, settings.Draw.compiled().draw_height_pixel)
+    merged = [span for span in spans if span.count > 1]
+    assert merged
+    rects = [(elem["x"], elem["fill"]) for elem in coalesced.svg_obj.elements if elem.elementname == "rect"]
+    for span in merged:
+        assert (span.x_offset, span.colour) in rects
+        for index in span.overlays:
+            fill = coalesced.get_dash_pattern(layout.heights[index], layout.distances[index], way.way_elems[index].colour, way.way_elems[index].background_colour) \
+                if layout.is_dashed(index) else way.way_elems[index].colour
+            assert (layout.x_offsets[index], fill) in rects
@@ -0,0 +1,156 @@
+# pylint: disable=missing-module-docstring
+
+import json
+import pathlib
+import shutil
+import subprocess
+import sys
+import pytest
+
+REPOSITORY = pathlib.Path(__file__).resolve().parent.parent
+
+# two ways with equal tags, an unrecognized highway value, an unrecognized tag and an unrecognized value
+OSM = """<?xml version="1.0" encoding="UTF-8"?>
+<osm version="0.6">
+ <way id="1"><tag k="highway" v="road"/><tag k="lanes" v="2"/></way>
+ <way id="2"><tag k="highway" v="road"/><tag k="lanes" v="2"/></way>
+ <way id="3"><tag k="highway" v="residential"/></way>
+ <way id="4"><tag k="highway" v="cycleway"/><tag k="surface" v="asphalt"/></way>
+ <way id="5"><tag k="highway" v="road"/><tag k="lanes" v="7"/></way>
+</osm>
+"""
+
+TAG_KINDS = ["unrecognized_highway", "unrecognized_tag", "unrecognized_value"]
+
+
+@pytest.fixture
+def work_dir(tmp_path: pathlib.Path) -> pathlib.Path:
+    """ copy of the scripts, settings and sign files, with an .osm file to draw """
+    for path in REPOSITORY.glob("*.py"):
+        shutil.copy(path, tmp_path)
+    shutil.copy(REPOSITORY / "draw_settings.json", tmp_path)
+    shutil.copytree(REPOSITORY / "img_src", tmp_path / "img_src")
+    (tmp_path / "svg").mkdir()
+    (tmp_path / "tagging.html").write_text("")
+    (tmp_path / "ways.osm").write_text(OSM)
+    return tmp_path
+
+
+def run_main(work_dir: pathlib.Path, *args: str) -> str:
+    result = subprocess.run([sys.executable, "main.py", "--osm", "ways.osm", "-q", *args], cwd=work_dir, capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def get_counts(work_dir: pathlib.Path) -> dict:
+    with open(work_dir / "diagnostics.json") as infile:
+        return {kind: entry["count"] for kind, entry in json.load(infile).items()}
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_dedupe_keeps_warnings(work_dir: pathlib.Path, jobs: str) -> None:
+    run_main(work_dir, "--rebuild")
+    expected = get_counts(work_dir)
+    run_main(work_dir, "--rebuild", "--dedupe", "-j", jobs)
+    counts = get_counts(work_dir)
+    for kind in TAG_KINDS:
+        assert counts[kind] == expected[kind]
+    # warnings not about tags, e.g. of the settings file, are kept as well
+    assert set(counts) == set(expected)
+
+
+def test_dedupe_after_normal_run(work_dir: pathlib.Path) -> None:
+    run_main(work_dir)
+    output = run_main(work_dir, "--dedupe")
+    # ways 1, 2 and 5, whose unrecognized lanes value is dropped, share one drawing named after its profile
+    assert "5 examples drawn as 3 unique drawings" in output
+    with open(work_dir / "render_index.json") as infile:
+        index = json.load(infile)
+    assert all(entry["file"].startswith("svg/profile_") for entry in index.values())
+
+
+def test_normal_after_dedupe_run(work_dir: pathlib.Path) -> None:
+    run_main(work_dir, "--dedupe")
+    run_main(work_dir)
+    for way_id in range(1, 6):
+        assert (work_dir / "svg" / ("way_" + str(way_id) + ".svg")).exists()
+    report = (work_dir / "tagging_generated.html").read_text()
+    assert "profile_" not in report
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_new_warnings_printed_once(work_dir: pathlib.Path, jobs: str) -> None:
+    (work_dir / "ways.osm").write_text(OSM.replace("</osm>", "".join(
+        "<way id=\"" + str(way_id) + "\"><tag k=\"highway\" v=\"residential\"/></way>\n" for way_id in range(10, 30)) + "</osm>"))
+    result = subprocess.run([sys.executable, "main.py", "--osm", "ways.osm", "-j", jobs], cwd=work_dir, capture_output=True, text=True, check=True)
+    lines = result.stdout.split("\n")
+    report = lines.index("warnings:")
+    assert lines[:report].count('warning: unrecognized tag "highway"="residential" found!') == 1
+
+
+def test_dedupe_with_scales(work_dir: pathlib.Path) -> None:
+    output = run_main(work_dir, "--dedupe", "--scales", "40", "80")
+    assert "5 examples drawn as 3 unique drawings" in output
+    with open(work_dir / "render_index.json") as infile:
+        index = json.load(infile)
+    for entry in index.values():
+        assert entry["file"].startswith("svg/40/profile_")
+        assert (work_dir / entry["file"]).exists()
+        assert (work_dir / entry["file"].replace("svg/40/", "svg/80/")).exists()
+    assert "svg/profile_" not in (work_dir / "tagging_generated.html").read_text()
+    # all drawings are taken from the build manifest
+    assert "wrote 0 files" in run_main(work_dir, "--dedupe", "--scales", "40", "80")
+
+
+def test_sprite_after_normal_run(work_dir: pathlib.Path) -> None:
+    run_main(work_dir)
+    # rows of the build manifest show the symbols as well
+    assert "wrote 0 files" in run_main(work_dir, "--sprite")
+    report = (work_dir / "tagging_generated.html").read_text()
+    assert "<img" not in report
+    for way_id in range(1, 6):
+        assert "<use href=\"sprite.svg#way_" + str(way_id) + "\"/>" in report
+    run_main(work_dir)
+    report = (work_dir / "tagging_generated.html").read_text()
+    assert "sprite.svg" not in report
+    assert report.count("<img") == 5
+
+
+def get_manifest_names(work_dir: pathlib.Path) -> set:
+    with open(work_dir / "build_manifest.json") as infile:
+        return set(json.load(infile)["examples"])
+
+
+def test_select_keeps_manifest(work_dir: pathlib.Path) -> None:
+    run_main(work_dir)
+    run_main(work_dir, "--select", "way_1")
+    assert get_manifest_names(work_dir) == {"way_" + str(way_id) for way_id in range(1, 6)}
+    assert "wrote 0 files" in run_main(work_dir)
+
+
+def test_removed_examples_dropped(work_dir: pathlib.Path) -> None:
+    (work_dir / "tags").mkdir()
+    way = {"name": "Way 1", "tags": {"highway": "cycleway"}}
+    (work_dir / "tags" / "tags.json").write_text(json.dumps({"a": {"ways": [way]}, "b": {"ways": [way]}}))
+
+    def run(*args: str) -> str:
+        return subprocess.run([sys.executable, "main.py", "-q", *args], cwd=work_dir, capture_output=True, text=True, check=True).stdout
+
+    run()
+    assert get_manifest_names(work_dir) == {"a", "b"}
+    (work_dir / "tags" / "tags.json").write_text(json.dumps({"a": {"ways": [way]}, "c": {"ways": [way]}}))
+    run("--select", "c")
+    assert get_manifest_names(work_dir) == {"a", "c"}
+
+
+def test_missing_scale_drawn_again(work_dir: pathlib.Path) -> None:
+    run_main(work_dir, "--scales", "40", "80")
+    (work_dir / "svg" / "80" / "way_1.svg").unlink()
+    assert "wrote 2 files" in run_main(work_dir, "--scales", "40", "80")
+    assert (work_dir / "svg" / "80" / "way_1.svg").exists()
+
+
+def test_settings_warnings_counted_once(work_dir: pathlib.Path) -> None:
+    # draw_settings.json is written by main.py, it is not checked a second time
+    unknown = (work_dir / "draw_settings.json").read_text().count('"?"')
+    run_main(work_dir)
+    assert get_counts(work_dir)["unknown_setting"] == unknown
@@ -0,0 +1,89 @@
+# pylint: disable=missing-module-docstring
+
+import pathlib
+import random
+import pytest
+import render_store
+from render_store import RenderStore, RenderStoreReader
+
+
+@pytest.fixture
+def prefix(tmp_path: pathlib.Path) -> str:
+    return str(tmp_path / "render_store")
+
+
+def get_svg(number: int) -> bytes:
+    return b"<svg>" + str(number).encode() + b"</svg>"
+
+
+def test_find(prefix: str):
+    # keys in random order, found by binary search of the sorted tables
+    way_ids = random.Random(1).sample(range(1, 1 << 40), 500)
+    store = RenderStore(prefix)
+    for number, way_id in enumerate(way_ids):
+        store.add("example" + str(number), get_svg(number), way_id)
+    store.save()
+    store.close()
+    with RenderStoreReader(prefix) as reader:
+        for number, way_id in enumerate(way_ids):
+            assert reader.get_by_way_id(way_id) == get_svg(number)
+            assert reader.get_by_name("example" + str(number)) == get_svg(number)
+        # missing keys below, between and above the stored ones
+        for way_id in [0, min(way_ids) - 1, max(way_ids) + 1, 1 << 63]:
+            if way_id not in way_ids:
+                assert reader.get_by_way_id(way_id) is None
+        assert reader.get_by_name("missing") is None
+
+
+@pytest.mark.parametrize("count", [0, 1, 2, 3])
+def test_find_small(prefix: str, count: int):
+    store = RenderStore(prefix)
+    for way_id in range(count):
+        store.add(str(way_id), get_svg(way_id), 2 * way_id + 1)
+    store.save()
+    store.close()
+    with RenderStoreReader(prefix) as reader:
+        for way_id in range(count):
+            assert reader.get_by_way_id(2 * way_id + 1) == get_svg(way_id)
+        for way_id in range(count + 1):
+            assert reader.get_by_way_id(2 * way_id) is None
+
+
+def test_payload_stored_once(prefix: str):
+    store = RenderStore(prefix)
+    store.add("a", get_svg(1), 1)
+    store.add("b", get_svg(1), 2)
+    store.add("c", get_svg(2))
+    store.save()
+    store.close()
+    with RenderStoreReader(prefix) as reader:
+        assert reader.get_counts() == {"ways": 2, "names": 3, "payloads": 2, "blob_bytes": len(get_svg(1)) + len(get_svg(2))}
+        assert reader.get_by_way_id(2) == get_svg(1)
+        assert reader.get_by_name("c") == get_svg(2)
+
+
+def test_update(prefix: str):
+    # entries of a previous run are kept, adding an example again replaces its entry
+    store = RenderStore(prefix)
+    store.add("a", get_svg(1), 1)
+    store.add("b", get_svg(2), 2)
+    store.save()
+    store.close()
+    store = RenderStore(prefix)
+    store.add("a", get_svg(3), 1)
+    store.add("c", get_svg(2), 3)
+    store.save()
+    assert store.added_bytes == len(get_svg(3))
+    store.close()
+    with RenderStoreReader(prefix) as reader:
+        assert reader.get_by_name("a") == reader.get_by_way_id(1) == get_svg(3)
+        assert reader.get_by_name("b") == get_svg(2)
+        assert reader.get_by_way_id(3) == get_svg(2)
+
+
+def test_other_index(prefix: str):
+    with open(prefix + ".idx", "wb") as outfile:
+        outfile.write(render_store.HEADER.pack(b"XXXX", render_store.VERSION, 0, 0, 0))
+    open(prefix + ".blob", "wb").close()
+    with pytest.raises(ValueError):
+        RenderStoreReader(prefix)
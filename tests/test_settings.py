@@ -0,0 +1,16 @@
+# pylint: disable=missing-module-docstring
+
+import pytest
+import settings
+
+
+def test_compile_section():
+    compiled = settings.compile_section("DrawSettings", {"strasse": {"linie": {"breite": "schmalstrich"}, "spurbreite": 3}}, {"schmalstrich": 0.12})
+    assert compiled.strasse.linie.breite == 0.12
+    assert compiled.strasse.spurbreite == 3
+
+
+@pytest.mark.parametrize("key", ["breite-min", "_breite", "2breite", "class", ""])
+def test_invalid_key(key: str):
+    with pytest.raises(ValueError, match="'strasse:linie:" + key + "'"):
+        settings.compile_section("DrawSettings", {"strasse": {"linie": {key: 1}}}, {})
@@ -0,0 +1,77 @@
+# pylint: disable=missing-module-docstring
+
+import pathlib
+from xml.etree import ElementTree
+from sprite import SVG_NAMESPACE, SpriteShard, SpriteSheet
+
+NAMESPACES = {"svg": SVG_NAMESPACE}
+
+
+def get_svg(width: int, colour: str = "white", sign: str = "sign_237") -> bytes:
+    """ drawing as written by Drawing.save(), with a dash pattern of its width and a traffic sign """
+    return ("""<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" width="{width}" height="100"><defs>"""
+            """<pattern height="6" id="strichmuster0" patternUnits="userSpaceOnUse" width="{width}" x="0" y="0">"""
+            """<rect fill="{colour}" height="1" width="{width}" x="0" y="0" /><rect fill="grey" height="4" width="{width}" x="0" y="1" /></pattern>"""
+            """<symbol id="{sign}"><rect fill="blue" height="1" width="1" x="0" y="0" /></symbol></defs>"""
+            """<rect fill="url(#strichmuster0)" height="100" width="{width}" x="0" y="0" /><use xlink:href="#{sign}" /></svg>""").format(width=width, colour=colour, sign=sign).encode()
+
+
+def get_fills(shard: SpriteShard, symbol_id: str) -> list:
+    return [rect.get("fill") for rect in shard.root.find("svg:symbol[@id='" + symbol_id + "']", NAMESPACES).iter("{" + SVG_NAMESPACE + "}rect")]
+
+
+def test_equal_patterns_defined_once(tmp_path: pathlib.Path):
+    # a pattern of the same dashes as a defined one is replaced by it, which is widened to the widest drawing
+    shard = SpriteShard(str(tmp_path / "sprite.svg"))
+    assert shard.add("a", "a.svg", get_svg(10)) == "0 0 10 100"
+    assert shard.add("b", "b.svg", get_svg(30)) == "0 0 30 100"
+    assert shard.add("c", "c.svg", get_svg(20)) == "0 0 20 100"
+    patterns = shard.defs.findall("svg:pattern", NAMESPACES)
+    assert len(patterns) == 1
+    assert {elem.get("width") for elem in patterns[0].iter()} == {"30"}
+    for symbol_id in "abc":
+        assert get_fills(shard, symbol_id) == ["url(#strichmuster0)"]
+    assert shard.symbols == 3
+
+
+def test_other_patterns_renamed(tmp_path: pathlib.Path):
+    # patterns of each drawing are numbered from 0, in the sheet they need ids of their own
+    shard = SpriteShard(str(tmp_path / "sprite.svg"))
+    shard.add("a", "a.svg", get_svg(10))
+    shard.add("b", "b.svg", get_svg(10, "yellow"))
+    assert [pattern.get("id") for pattern in shard.defs.findall("svg:pattern", NAMESPACES)] == ["strichmuster0", "strichmuster1"]
+    assert get_fills(shard, "a") == ["url(#strichmuster0)"]
+    assert get_fills(shard, "b") == ["url(#strichmuster1)"]
+
+
+def test_signs_defined_once(tmp_path: pathlib.Path):
+    shard = SpriteShard(str(tmp_path / "sprite.svg"))
+    shard.add("a", "a.svg", get_svg(10))
+    shard.add("b", "b.svg", get_svg(10))
+    shard.add("c", "c.svg", get_svg(10, sign="sign_240"))
+    assert [symbol.get("id") for symbol in shard.defs.findall("svg:symbol", NAMESPACES)] == ["sign_237", "sign_240"]
+    shard.save()
+    saved = ElementTree.parse(shard.file_name).getroot()
+    assert [symbol.get("id") for symbol in saved.findall("svg:symbol", NAMESPACES)] == ["a", "b", "c"]
+
+
+def test_sheet_adds_file_once(tmp_path: pathlib.Path):
+    (tmp_path / "a.svg").write_bytes(get_svg(10))
+    sheet = SpriteSheet(str(tmp_path / "sprite.svg"))
+    location = sheet.add(str(tmp_path / "a.svg"))
+    assert location == (str(tmp_path / "sprite.svg") + "#a", "0 0 10 100")
+    assert sheet.add(str(tmp_path / "a.svg"), get_svg(20)) == location
+    assert sheet.shard.symbols == 1
+
+
+def test_sheet_shards(tmp_path: pathlib.Path):
+    sheet = SpriteSheet(str(tmp_path / "sprite.svg"), shard_size=2)
+    references = [sheet.add(name + ".svg", get_svg(10))[0] for name in "abcde"]
+    sheet.save()
+    assert [pathlib.Path(reference).name for reference in references] == \
+        ["sprite_0.svg#a", "sprite_0.svg#b", "sprite_1.svg#c", "sprite_1.svg#d", "sprite_2.svg#e"]
+    for shard in range(3):
+        # each shard defines the pattern and sign its symbols use
+        root = ElementTree.parse(str(tmp_path / ("sprite_" + str(shard) + ".svg"))).getroot()
+        assert len(root.findall("svg:defs/svg:pattern", NAMESPACES)) == 1
+        assert len(root.findall("svg:defs/svg:symbol", NAMESPACES)) == 1
@@ -0,0 +1,93 @@
+# pylint: disable=missing-module-docstring
+
+import json
+import pathlib
+import tagging
+
+REPOSITORY = pathlib.Path(__file__).resolve().parent.parent
+
+
+def write_tags(path: pathlib.Path, examples: dict) -> str:
+    path.write_text(json.dumps(examples, indent=4, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def get_example(sort_weight: float, highway: str = "road") -> dict:
+    return {"sort_weight": sort_weight, "ways": [{"name": "Way 1", "tags": {"highway": highway}}]}
+
+
+def test_index_positions(tmp_path: pathlib.Path):
+    # offsets are in bytes, names and values before an example may have multibyte characters
+    examples = {"straße": get_example(2, "höhe"), "weg": get_example(1), "empty": {}}
+    file_name = write_tags(tmp_path / "tags.json", examples)
+    entries = tagging.index_tags_file(file_name)
+    assert [(entry.name, entry.sort_weight) for entry in entries] == [("straße", 2), ("weg", 1), ("empty", 0)]
+    data = (tmp_path / "tags.json").read_bytes()
+    for entry in entries:
+        assert json.loads(data[entry.offset:entry.offset + entry.length]) == examples[entry.name]
+
+
+def test_index_repeated_name(tmp_path: pathlib.Path):
+    # like json.load, the first place in the order and the last value
+    text = '{"a": {"sort_weight": 1}, "b": {}, "a": {"sort_weight": 3}}'
+    (tmp_path / "tags.json").write_text(text)
+    entries = tagging.index_tags_file(str(tmp_path / "tags.json"))
+    assert [(entry.name, entry.sort_weight) for entry in entries] == [("a", 3), ("b", 0)]
+    assert entries[0].offset == text.index('{"sort_weight": 3}')
+
+
+def test_index_empty(tmp_path: pathlib.Path):
+    (tmp_path / "tags.json").write_text(" { } ")
+    assert tagging.index_tags_file(str(tmp_path / "tags.json")) == []
+
+
+def test_merge_order(tmp_path: pathlib.Path):
+    # equal weights keep the order of the files and of the examples in a file
+    write_tags(tmp_path / "a.json", {"a3": get_example(3), "a1": get_example(1), "a0": get_example(0), "a1b": get_example(1)})
+    write_tags(tmp_path / "b.json", {"b1": get_example(1), "b2": get_example(2), "b0": get_example(0)})
+    index = tagging.TagIndex(str(tmp_path))
+    corpus = index.select()
+    # the order of reading all examples file by file and sorting them
+    examples = []
+    for file_name in index.files:
+        with open(file_name) as infile:
+            examples.extend(tagging.Example(name, data) for name, data in json.load(infile).items())
+    examples.sort(key=lambda example: example.sort_weight)
+    assert len(corpus) == 7
+    assert [example.name for example in corpus] == [example.name for example in examples]
+    assert [entry.name for entry in corpus.get_entries()] == [example.name for example in examples]
+
+
+def test_select(tmp_path: pathlib.Path):
+    write_tags(tmp_path / "a.json", {"strasse1": get_example(1), "weg": get_example(0)})
+    write_tags(tmp_path / "b.json", {"strasse2": get_example(0)})
+    index = tagging.TagIndex(str(tmp_path))
+    assert [example.name for example in index.select(["strasse*"])] == ["strasse2", "strasse1"]
+    assert [example.name for example in index.select(["strasse*"], ["a.json"])] == ["strasse1"]
+
+
+def test_saved_index(tmp_path: pathlib.Path):
+    # unchanged files are not read again, changed files are
+    file_name = write_tags(tmp_path / "a.json", {"a": get_example(1)})
+    index_file = str(tmp_path / "index.json")
+    tagging.TagIndex(str(tmp_path), index_file)
+    saved = json.loads(pathlib.Path(index_file).read_text())
+    saved[file_name]["entries"][0][0] = "from index"
+    pathlib.Path(index_file).write_text(json.dumps(saved))
+    assert [entry.name for entry in tagging.TagIndex(str(tmp_path), index_file).files[file_name]] == ["from index"]
+    write_tags(tmp_path / "a.json", {"changed": get_example(1)})
+    assert [entry.name for entry in tagging.TagIndex(str(tmp_path), index_file).files[file_name]] == ["changed"]
+
+
+def test_repository_tags():
+    # the examples of the repository in the order of reading them all
+    directory = str(REPOSITORY / "tags")
+    index = tagging.TagIndex(directory)
+    examples = []
+    for file_name in index.files:
+        with open(file_name) as infile:
+            examples.extend(tagging.Example(name, data) for name, data in json.load(infile).items())
+    examples.sort(key=lambda example: example.sort_weight)
+    loaded = list(tagging.Tags(directory))
+    assert [example.name for example in loaded] == [example.name for example in examples]
+    assert loaded == examples
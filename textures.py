@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+
+""" build the raster textures of img_src into img_intermediate and img_result, formerly done by generate.sh,
+sizes are taken from draw_settings.json, only images whose sources or parameters changed are built again """
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import sys
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree
+from PIL import Image
+import settings
+from diagnostics import Diagnostics
+
+try:
+    import cairosvg
+except ImportError:
+    # signs can not be built without, they are marked as not built and the build fails
+    cairosvg = None
+
+SOURCE = "img_src/"
+INTERMEDIATE = "img_intermediate/"
+RESULT = "img_result/"
+
+# colour of cycleways, as in generate.sh
+TINT_COLOUR = (255, 0, 0)
+
+# manifest entry of an output which could not be built
+NOT_BUILT = "not built, cairosvg is not installed"
+
+
+class Step(typing.NamedTuple):
+    """ image output made by action from the images inputs, which are source files or outputs of other steps """
+    output: str
+    action: str
+    inputs: typing.Tuple[str, ...]
+    params: typing.Tuple = ()
+
+
+def tint(image: Image.Image, colour: typing.Tuple[int, int, int], amount: float = 0.5) -> Image.Image:
+    """ like convert -tint: shift mid-tones towards colour, black and white stay as they are """
+    image = image.convert("RGB")
+    intensity = 0.299 * colour[0] + 0.587 * colour[1] + 0.114 * colour[2]
+    lut = []
+    for channel in colour:
+        shift = amount * channel - intensity
+        lut += [min(255, max(0, round(value + shift * (1 - 4 * (value / 255 - 0.5) ** 2)))) for value in range(256)]
+    return image.point(lut)
+
+
+def append(images: typing.List[Image.Image], horizontal: bool) -> Image.Image:
+    """ like convert +append (horizontal) and -append """
+    if horizontal:
+        size = (sum(image.width for image in images), max(image.height for image in images))
+    else:
+        size = (max(image.width for image in images), sum(image.height for image in images))
+    result = Image.new("RGBA", size, (0, 0, 0, 0))
+    offset = 0
+    for image in images:
+        result.paste(image.convert("RGBA"), (offset, 0) if horizontal else (0, offset))
+        offset += image.width if horizontal else image.height
+    return result
+
+
+def rasterize(path: str, width: int, height: int) -> Image.Image:
+    """ svg file as image of the given size """
+    with open(path, "rb") as infile:
+        png = cairosvg.svg2png(file_obj=infile, output_width=width, output_height=height)
+    return Image.open(io.BytesIO(png))
+
+
+ACTIONS: typing.Dict[str, typing.Callable[..., Image.Image]] = {
+    "tint": lambda images, colour: tint(images[0], colour),
+    "resize": lambda images, width, height: images[0].resize((width, height), Image.LANCZOS),
+    "crop": lambda images, width, height: images[0].crop((0, 0, width, height)),
+    "append_horizontal": lambda images: append(images, True),
+    "append_vertical": lambda images: append(images, False),
+}
+
+
+def get_sign_size(path: str, width: int) -> typing.Tuple[int, int]:
+    """ size of a rasterized sign of the given width, keeping the aspect ratio of its svg file """
+    root = ElementTree.parse(path).getroot()
+    return width, round(width * float(root.get("height")) / float(root.get("width")))
+
+
+def get_steps(draw_settings: typing.NamedTuple) -> typing.List[Step]:
+    """ all steps of generate.sh, with sizes in pixel from draw settings """
+    def pixel(meter: float) -> int:
+        return max(1, round(meter * draw_settings.pixel_pro_meter))
+
+    height = pixel(draw_settings.draw_height_meter)
+    linie = draw_settings.strasse.linie
+    schmal = pixel(linie.schmalstrich)
+    breit = pixel(linie.breitstrich)
+    hochbord = draw_settings.cycleway.ausgeschildert.hochbord
+    schutzstreifen = draw_settings.cycleway.schutzstreifen
+
+    steps = [
+        Step(INTERMEDIATE + "red_asphalt.png", "tint", (SOURCE + "asphalt.jpg",), (TINT_COLOUR,)),
+        Step(INTERMEDIATE + "red_paving_stones.png", "tint", (SOURCE + "paving_stones.jpg",), (TINT_COLOUR,)),
+    ]
+
+    def resize(output: str, source: str, width: int, image_height: int = height) -> None:
+        steps.append(Step(INTERMEDIATE + output, "resize", (source,), (width, image_height)))
+
+    resize("line_breit.png", SOURCE + "line.png", breit)
+    resize("grass2.png", SOURCE + "grass.jpg", pixel(draw_settings.gruenstreifen.breite.max))
+    resize("line_schmal.png", SOURCE + "line.png", schmal)
+    resize("str_spur.png", SOURCE + "asphalt.jpg", pixel(draw_settings.strasse.spurbreite))
+    resize("str_spur_doppel_ohne_schutzstreifen.png", SOURCE + "asphalt.jpg", pixel(2 * draw_settings.strasse.spurbreite - schutzstreifen.breite.min))
+    resize("str_schmallinie.png", SOURCE + "asphalt.jpg", schmal)
+    resize("str_breitlinie.png", SOURCE + "asphalt.jpg", breit)
+
+    # dashed lines, lines and gaps repeated until the height of a drawing, starting with half a line
+    def dashed(name: str, length: float, distance: float) -> None:
+        resize(name + "_mitte.png", SOURCE + "line.png", schmal, pixel(length))
+        resize(name + "_top.png", SOURCE + "line.png", schmal, pixel(length / 2))
+        resize(name + "_luecke.png", INTERMEDIATE + "str_schmallinie.png", schmal, pixel(distance))
+        parts = [name + "_top.png"]
+        while (len(parts) // 2) * (length + distance) + length / 2 < draw_settings.draw_height_meter:
+            parts += [name + "_luecke.png", name + "_mitte.png"]
+        steps.append(Step(INTERMEDIATE + name + "_lang.png", "append_vertical", tuple(INTERMEDIATE + part for part in parts)))
+        steps.append(Step(INTERMEDIATE + name + ".png", "crop", (INTERMEDIATE + name + "_lang.png",), (schmal, height)))
+
+    dashed("leitlinie", linie.leitlinie.laenge, linie.leitlinie.abstand)
+    dashed("fss_linie", schutzstreifen.seitenlinie.links.laenge, schutzstreifen.seitenlinie.links.abstand)
+
+    resize("bordstein.png", SOURCE + "bordstein.png", pixel(draw_settings.strasse.bordstein.breite))
+    resize("gehweg_2.50.png", SOURCE + "paving_stones.jpg", pixel(draw_settings.gehweg.breite.min))
+    resize("hochbordradweg_2.4.png", INTERMEDIATE + "red_asphalt.png", pixel(hochbord.links.breite.opt))
+    resize("gemein_hochbordradweg_2.5.png", SOURCE + "asphalt.jpg", pixel(hochbord.geh_rad.breite.min))
+    resize("hochbordradweg_2.0.png", INTERMEDIATE + "red_asphalt.png", pixel(hochbord.breite.opt))
+    resize("hochbordradweg_1.5.png", INTERMEDIATE + "red_asphalt.png", pixel(hochbord.breite.min))
+    resize("schutzstreifen_1.5.png", SOURCE + "asphalt.jpg", pixel(schutzstreifen.breite.min))
+    resize("schutzstreifen_1.85.png", SOURCE + "asphalt.jpg", pixel(draw_settings.cycleway.ausgeschildert.radfahrstreifen.breite.min))
+    steps.append(Step(INTERMEDIATE + "radfahrstreifen_1.5.png", "tint", (INTERMEDIATE + "schutzstreifen_1.5.png",), (TINT_COLOUR,)))
+    steps.append(Step(INTERMEDIATE + "radfahrstreifen_1.85.png", "tint", (INTERMEDIATE + "schutzstreifen_1.85.png",), (TINT_COLOUR,)))
+
+    # cross sections, from left to right
+    def cross_section(output: str, parts: str) -> None:
+        steps.append(Step(output, "append_horizontal", tuple(INTERMEDIATE + part + ".png" for part in parts.split())))
+
+    cross_section(INTERMEDIATE + "road.png", "str_schmallinie line_schmal str_spur leitlinie str_spur line_schmal str_schmallinie")
+    cross_section(INTERMEDIATE + "strasse_gras.png", "grass2 bordstein road bordstein grass2")
+    road = "grass2 bordstein road bordstein "
+    road_lanes = "grass2 bordstein str_schmallinie line_schmal str_spur leitlinie str_spur "
+    steps.append(Step(RESULT + "strasse_gras.png", "append_horizontal", (INTERMEDIATE + "strasse_gras.png",)))
+    cross_section(RESULT + "strasse2.png", "strasse_gras hochbordradweg_2.0 grass2 gehweg_2.50 grass2")
+    cross_section(RESULT + "strasse2.1.png", "strasse_gras hochbordradweg_2.0 gehweg_2.50 grass2")
+    cross_section(RESULT + "strasse2.1.1.png", "strasse_gras hochbordradweg_1.5 gehweg_2.50 grass2")
+    cross_section(RESULT + "strasse2.2.png", road + "hochbordradweg_2.0 grass2 gehweg_2.50 grass2")
+    cross_section(RESULT + "strasse2_doppel.png", "strasse_gras hochbordradweg_2.4 grass2 gehweg_2.50 grass2")
+    cross_section(RESULT + "strasse2_doppel.1.png", "strasse_gras hochbordradweg_2.4 gehweg_2.50 grass2")
+    cross_section(RESULT + "strasse2_doppel.2.png", road + "hochbordradweg_2.4 grass2 gehweg_2.50 grass2")
+    cross_section(RESULT + "strasse3.png", road_lanes + "fss_linie schutzstreifen_1.5 fss_linie str_schmallinie bordstein grass2 gehweg_2.50 grass2")
+    cross_section(RESULT + "strasse3.1.png", "grass2 bordstein str_schmallinie line_schmal str_spur_doppel_ohne_schutzstreifen fss_linie schutzstreifen_1.5 fss_linie str_schmallinie bordstein grass2 gehweg_2.50 grass2")
+    cross_section(RESULT + "strasse4.png", road_lanes + "line_breit radfahrstreifen_1.5 line_schmal str_schmallinie bordstein grass2 gehweg_2.50 grass2")
+    cross_section(RESULT + "strasse5.png", road_lanes + "line_schmal str_schmallinie bordstein grass2 gehweg_2.50 grass2")
+    cross_section(RESULT + "strasse6.png", road_lanes + "line_schmal str_schmallinie bordstein grass2 gemein_hochbordradweg_2.5 grass2")
+
+    # signs to put on top, in the size they are drawn in svg files, named by their real size as by generate.sh
+    schild = draw_settings.schild
+    sizes = [("600mm", schild.breite.gross), ("420mm", schild.breite.klein)]
+    zusatz_sizes = [("450x600mm", schild.zusatz.breite.gross), ("315x420mm", schild.zusatz.breite.klein)]
+    for sign, sign_sizes in [("237", sizes), ("239", sizes), ("240", sizes), ("241-30", sizes), ("1022-10", zusatz_sizes), ("1000-31", zusatz_sizes)]:
+        for size_name, meter in sign_sizes:
+            path = SOURCE + "VZ_" + sign + ".svg"
+            width, sign_height = get_sign_size(path, pixel(meter * schild.groessenfaktor))
+            steps.append(Step(RESULT + "VZ_" + sign + "_" + size_name + ".png", "rasterize", (path,), (width, sign_height)))
+    return steps
+
+
+class TextureBuild:
+    """ builds steps after the steps they depend on, independent steps in parallel,
+    steps whose output exists and whose action, parameters and inputs did not change since the last build are skipped """
+    steps: typing.Dict[str, Step]
+    manifest_file: str
+    # signature of each built output
+    manifest: typing.Dict[str, str]
+
+    # outputs which could not be built
+    not_built: typing.List[str]
+
+    def __init__(self: 'TextureBuild', steps: typing.List[Step], manifest_file: str = "textures_manifest.json", load: bool = True) -> 'TextureBuild':
+        self.steps = {step.output: step for step in steps}
+        self.manifest_file = manifest_file
+        self.manifest = {}
+        if load and os.path.exists(manifest_file):
+            with open(manifest_file) as json_file:
+                self.manifest = json.load(json_file)
+        self.signatures: typing.Dict[str, str] = {}
+
+    def get_signature(self: 'TextureBuild', path: str) -> str:
+        """ hash of a source file, or of the action, parameters and input signatures of a step """
+        if path not in self.signatures:
+            step = self.steps.get(path)
+            if step is None:
+                with open(path, "rb") as infile:
+                    self.signatures[path] = hashlib.sha256(infile.read()).hexdigest()
+            else:
+                data = [step.action, step.params, [self.get_signature(source) for source in step.inputs]]
+                self.signatures[path] = hashlib.sha256(json.dumps(data).encode("utf-8")).hexdigest()
+        return self.signatures[path]
+
+    def get_levels(self: 'TextureBuild') -> typing.List[typing.List[Step]]:
+        """ steps grouped so that each step only depends on steps of earlier groups """
+        depth: typing.Dict[str, int] = {}
+
+        def get_depth(path: str) -> int:
+            if path not in self.steps:
+                return -1
+            if path not in depth:
+                depth[path] = 1 + max((get_depth(source) for source in self.steps[path].inputs), default=-1)
+            return depth[path]
+
+        levels: typing.List[typing.List[Step]] = []
+        for path, step in self.steps.items():
+            level = get_depth(path)
+            while len(levels) <= level:
+                levels.append([])
+            levels[level].append(step)
+        return levels
+
+    @staticmethod
+    def run_step(step: Step) -> None:
+        if step.action == "rasterize":
+            image = rasterize(step.inputs[0], *step.params)
+        else:
+            image = ACTIONS[step.action]([Image.open(source) for source in step.inputs], *step.params)
+        os.makedirs(os.path.dirname(step.output), exist_ok=True)
+        image.save(step.output)
+
+    def build(self: 'TextureBuild', jobs: int = 1) -> typing.List[str]:
+        """ build outdated steps, return their outputs, those which can not be built are listed in not_built """
+        built = []
+        self.not_built = []
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            for level in self.get_levels():
+                todo = [step for step in level if self.manifest.get(step.output) != self.get_signature(step.output) or not os.path.exists(step.output)]
+                if cairosvg is None:
+                    # marked in the manifest, thus built once cairosvg is installed
+                    for step in todo:
+                        if step.action == "rasterize":
+                            self.manifest[step.output] = NOT_BUILT
+                            self.not_built.append(step.output)
+                    todo = [step for step in todo if step.action != "rasterize"]
+                # list() to raise errors of steps before the next level
+                list(executor.map(TextureBuild.run_step, todo))
+                for step in todo:
+                    self.manifest[step.output] = self.get_signature(step.output)
+                    built.append(step.output)
+        return built
+
+    def save(self: 'TextureBuild') -> None:
+        with open(self.manifest_file, "w") as outfile:
+            json.dump(self.manifest, outfile, sort_keys=True, indent=4)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="number of images built in parallel (default: number of cpus)")
+    parser.add_argument("--rebuild", action="store_true", help="ignore textures_manifest.json and build every image")
+    args = parser.parse_args()
+
+    # warnings about draw settings are reported by main.py
+    Diagnostics.verbosity = Diagnostics.QUIET
+    settings.Draw.set_default_settings()
+    steps = get_steps(settings.Draw.compiled())
+
+    build = TextureBuild(steps, load=not args.rebuild)
+    try:
+        built = build.build(args.jobs)
+    finally:
+        # keep the steps built until an error
+        build.save()
+    print("built", len(built), "of", len(steps), "images")
+    if build.not_built:
+        print("cairosvg is not installed, not built:", " ".join(build.not_built), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
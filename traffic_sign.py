@@ -1,52 +1,112 @@
-import svgutils
+import typing
+from xml.etree import ElementTree
+import svgwrite
 import settings
 
-
-class TrafficSign:
+SVG_NAMESPACE = "{http://www.w3.org/2000/svg}"
+XLINK_NAMESPACE = "{http://www.w3.org/1999/xlink}"
+XML_NAMESPACE = "{http://www.w3.org/XML/1998/namespace}"
+
+
+def import_svg_element(element: ElementTree.Element) -> typing.Optional[ElementTree.Element]:
+    """ copy a parsed svg element, so it can be added to a svgwrite drawing, None if it is not an svg element """
+    if not isinstance(element.tag, str) or not element.tag.startswith(SVG_NAMESPACE):
+        # comments, metadata and editor specific elements
+        return None
+    imported = ElementTree.Element(element.tag[len(SVG_NAMESPACE):])
+    for key, value in element.attrib.items():
+        if key.startswith(XLINK_NAMESPACE):
+            imported.set("xlink:" + key[len(XLINK_NAMESPACE):], value)
+        elif key.startswith(XML_NAMESPACE):
+            imported.set("xml:" + key[len(XML_NAMESPACE):], value)
+        elif not key.startswith("{"):
+            imported.set(key, value)
+    imported.text = element.text
+    for child in element:
+        imported_child = import_svg_element(child)
+        if imported_child is not None:
+            imported_child.tail = child.tail
+            imported.append(imported_child)
+    return imported
+
+
+class ImportedSymbol(svgwrite.container.Symbol):
+    """ svgwrite symbol containing elements of another svg file """
+
+    def __init__(self: 'ImportedSymbol', imported: typing.List[ElementTree.Element], **extra) -> 'ImportedSymbol':
+        super().__init__(**extra)
+        self.imported = imported
+
+    def get_xml(self: 'ImportedSymbol') -> ElementTree.Element:
+        xml = super().get_xml()
+        xml.extend(self.imported)
+        return xml
+
+
+class SignAsset:
+    """ parsed svg file of a traffic sign, each file is only parsed once per process """
     name: str
+    size: typing.Tuple[float, float]
 
-    def __init__(self: 'TrafficSign', name: str, side_weight=1/2) -> 'TrafficSign':
-        self.name: str = name
-        self.svg = svgutils.transform.fromfile(self.get_path())
-        self.svg_size = self.svg.get_size()
-        self.side_weight = side_weight
+    # static class member, parsed sign files by sign name
+    assets: typing.Dict[str, 'SignAsset'] = {}
+    # static class member, number of sign files parsed
+    parse_count: int = 0
 
-        pixel_pro_meter = settings.Draw()["pixel_pro_meter"]
-        groessenfaktor = settings.Draw()["schild"]["groessenfaktor"]
-        breite = settings.Draw()["schild"]["breite"]["gross"]
+    def __init__(self: 'SignAsset', name: str) -> 'SignAsset':
+        self.name = name
+        SignAsset.parse_count += 1
+        root = ElementTree.parse(SignAsset.get_path(name)).getroot()
+        self.size = (float(root.get("width")), float(root.get("height")))
+        self.view_box = root.get("viewBox", "0 0 " + root.get("width") + " " + root.get("height"))
+        self.symbol = ImportedSymbol([elem for elem in map(import_svg_element, root) if elem is not None], id=self.get_id())
+        self.symbol.viewbox(*[float(val) for val in self.view_box.replace(",", " ").split()])
 
-        self.multiplier: float = pixel_pro_meter * groessenfaktor * breite / float(self.svg_size[0])
-        self.size_multiplier = (self.multiplier, self.multiplier * float(self.svg_size[1]) / float(self.svg_size[0]))
+    @staticmethod
+    def get(name: str) -> 'SignAsset':
+        if name not in SignAsset.assets:
+            SignAsset.assets[name] = SignAsset(name)
+        return SignAsset.assets[name]
 
-        self._width = float(self.svg.width) * self.multiplier
-        self._height = float(self.svg.height) * self.multiplier
+    @staticmethod
+    def get_path(name: str) -> str:
+        return "img_src/VZ_" + name + ".svg"
 
-    def get_svg(self: 'TrafficSign', offset_x: float = 0, offset_y: float = 0) -> svgutils.transform.SVGFigure:
-        originalSVG = svgutils.compose.SVG(self.get_path())
-        originalSVG.scale(self.multiplier)
+    def get_id(self: 'SignAsset') -> str:
+        return "VZ_" + self.name
 
-        # final_size_placement = (self._width + offset_x, self._height + offset_y)
 
-        offset_x -= float(self.svg_size[0]) / 2 * self.multiplier
-        offset_y -= float(self.svg_size[1]) / 2 * self.multiplier
+class TrafficSign:
+    name: str
 
-        originalSVG.move(offset_x, offset_y)
+    def __init__(self: 'TrafficSign', name: str, side_weight=1/2) -> 'TrafficSign':
+        self.name: str = name
+        self.asset = SignAsset.get(name)
+        self.svg_size = self.asset.size
+        self.side_weight = side_weight
 
-        #print("offset_x", offset_x, "offset_y", offset_y, "size_multiplier", self.size_multiplier, "final_size", final_size_placement)
+    def get_symbol(self: 'TrafficSign') -> ImportedSymbol:
+        """ get definition of the sign, to be added once per drawing """
+        return self.asset.symbol
 
-        # final_svg_to_save = svgutils.compose.Figure(final_size_placement[0], final_size_placement[1], originalSVG)
-        # final_svg_to_save.save(".ts_temp.svg")
-        # print(self.name)
-        return originalSVG
+    def get_use(self: 'TrafficSign', offset_x: float = 0, offset_y: float = 0) -> svgwrite.container.Use:
+        """ get reference to the symbol of the sign, centered on the given offset """
+        width = self.get_width()
+        height = self.get_height()
+        return svgwrite.container.Use("#" + self.asset.get_id(), insert=(offset_x - width / 2, offset_y - height / 2), size=(width, height))
 
     def get_path(self: 'TrafficSign') -> str:
-        return "img_src/VZ_" + self.name + ".svg"
+        return SignAsset.get_path(self.name)
+
+    def get_multiplier(self: 'TrafficSign') -> float:
+        """ pixel per unit of the svg file of the sign, at the current pixel_pro_meter """
+        return settings.Draw.compiled().schild_breite_pixel / self.svg_size[0]
 
     def get_height(self: 'TrafficSign') -> float:
-        return self._height
+        return self.svg_size[1] * self.get_multiplier()
 
     def get_width(self: 'TrafficSign') -> float:
-        return self._width
+        return self.svg_size[0] * self.get_multiplier()
 
     def __repr__(self: 'TrafficSign') -> str:
         return "TrafficSign " + self.name
@@ -0,0 +1,151 @@
+# pylint: disable=missing-module-docstring
+
+import typing
+import glob
+import heapq
+import os
+import time
+import settings
+from build_cache import BuildCache
+from diagnostics import Diagnostics
+from drawing import Drawing
+from file_writer import write_atomic
+from report import ReportWriter
+from tagging import Example, TagCorpus, TagIndex
+from traffic_sign import SignAsset
+
+
+class Watcher:
+    """ keeps examples, draw settings and sign files in memory after a run,
+    on changes of their files redraws only the affected examples and rewrites the report """
+    cache: BuildCache
+    new_report: typing.Callable[[], ReportWriter]
+    draw: typing.Callable
+    names: typing.Optional[typing.List[str]]
+    files: typing.Optional[typing.List[str]]
+
+    directory = "tags"
+    index_file = "tags_index.json"
+    settings_file = "draw_settings.json"
+    sign_pattern = "img_src/VZ_*.svg"
+
+    # examples by tags file, modification times by watched file, resolved draw settings by top level key
+    examples: typing.Dict[str, typing.List[Example]]
+    mtimes: typing.Dict[str, int]
+    settings_values: typing.Dict[str, str]
+    # names of all examples of the tags files, also of those not selected
+    all_names: typing.Set[str]
+
+    def __init__(self: 'Watcher', cache: BuildCache, new_report: typing.Callable[[], ReportWriter], draw, names: typing.Optional[typing.List[str]] = None, files: typing.Optional[typing.List[str]] = None) -> 'Watcher':
+        # draw(index, example) draws an example in this process, e.g. main.render_example
+        self.cache = cache
+        self.new_report = new_report
+        self.draw = draw
+        self.names = names
+        self.files = files
+        self.examples = {}
+        self.load_examples(None)
+        self.mtimes = Watcher.get_mtimes()
+        self.settings_values = Watcher.get_settings_values()
+
+    @staticmethod
+    def get_mtimes() -> typing.Dict[str, int]:
+        paths = glob.glob(os.path.join(Watcher.directory, "*.json")) + glob.glob(Watcher.sign_pattern) + [Watcher.settings_file]
+        return {path: os.stat(path).st_mtime_ns for path in paths if os.path.exists(path)}
+
+    @staticmethod
+    def get_settings_values() -> typing.Dict[str, str]:
+        return {key: repr(value) for key, value in settings.Draw.compiled()._asdict().items()}
+
+    def load_examples(self: 'Watcher', changed_files: typing.Optional[typing.Set[str]]) -> typing.Set[str]:
+        """ read the changed tags files again, None for all, return names of new or changed examples """
+        index = TagIndex(self.directory, self.index_file)
+        self.all_names = index.get_names()
+        corpus = index.select(self.names, self.files)
+        affected = set()
+        for file_name in list(self.examples):
+            if file_name not in corpus.files:
+                del self.examples[file_name]
+        for file_name, entries in corpus.files.items():
+            if changed_files is not None and file_name not in changed_files and file_name in self.examples:
+                continue
+            self.examples[file_name] = list(TagCorpus({file_name: entries}))
+            for example in self.examples[file_name]:
+                entry = self.cache.entries.get(example.name)
+                if entry is None or entry["example"] != BuildCache.example_hash(example):
+                    affected.add(example.name)
+        return affected
+
+    def get_examples(self: 'Watcher') -> typing.Iterator[Example]:
+        """ examples in order of sort_weight, like TagCorpus """
+        return heapq.merge(*self.examples.values(), key=lambda example: example.sort_weight)
+
+    def get_affected(self: 'Watcher', changed: typing.Set[str]) -> typing.Set[str]:
+        """ names of the examples whose drawing depends on a changed file """
+        affected = set()
+        changed_tags = {path for path in changed if path.startswith(self.directory + os.sep)}
+        if changed_tags:
+            affected |= self.load_examples(changed_tags)
+
+        if self.settings_file in changed:
+            settings.Draw.reload()
+            values = Watcher.get_settings_values()
+            changed_keys = {key for key in values.keys() | self.settings_values.keys() if values.get(key) != self.settings_values.get(key)}
+            self.settings_values = values
+            print("changed draw settings:", ", ".join(sorted(changed_keys)) or "none")
+            affected |= {name for name, entry in self.cache.entries.items() if changed_keys.intersection(entry["settings_keys"])}
+
+        for path in changed - changed_tags - {self.settings_file}:
+            # sign file, parse again when used
+            SignAsset.assets.pop(os.path.basename(path)[len("VZ_"):-len(".svg")], None)
+            self.cache.file_hashes.pop(path, None)
+            affected |= {name for name, entry in self.cache.entries.items() if path in entry["assets"]}
+        return affected
+
+    def update(self: 'Watcher', changed: typing.Set[str]) -> None:
+        start = time.perf_counter()
+        affected = self.get_affected(changed)
+        examples = list(self.get_examples())
+        for index, example in enumerate(examples):
+            if example.name in affected:
+                result = self.draw(index, example)
+                for file_name, data in result.files:
+                    write_atomic(file_name, data)
+                self.cache.store(example, result.file_name, result.tags_html, result.settings_keys, result.assets)
+                Diagnostics.merge(result.warnings)
+
+        # examples of removed files or removed from their file
+        names = {example.name for example in examples}
+        for name in list(self.cache.entries):
+            if name not in names:
+                del self.cache.entries[name]
+
+        report = self.new_report()
+        for example in examples:
+            entry = self.cache.entries[example.name]
+            report.write_row(example, Drawing.get_row_html(Drawing.get_image_html(entry["file_name"]), entry["tags_html"]))
+        report.close()
+        self.cache.save(self.all_names)
+        print("redrew", len(affected & names), "of", len(examples), "examples in", "{:.3f}s".format(time.perf_counter() - start))
+        if Diagnostics.counts:
+            print(Diagnostics.get_report())
+            Diagnostics.take()
+
+    def run(self: 'Watcher', interval: float = 0.2) -> None:
+        """ poll the watched files every interval seconds, until interrupted """
+        print("watching", self.directory, self.settings_file, "and", os.path.dirname(self.sign_pattern) + ", stop with ctrl+c")
+        try:
+            while True:
+                time.sleep(interval)
+                mtimes = Watcher.get_mtimes()
+                changed = {path for path in mtimes.keys() | self.mtimes.keys() if mtimes.get(path) != self.mtimes.get(path)}
+                if not changed:
+                    continue
+                self.mtimes = mtimes
+                try:
+                    self.update(changed)
+                except (ValueError, KeyError, OSError) as error:
+                    # e.g. a file saved while half edited, wait for the next change
+                    print("error:", error)
+        except KeyboardInterrupt:
+            pass
@@ -1,9 +1,42 @@
 import settings
 import typing
 from way_element import WayElement
-from pprint import pprint
 import tagging
 import traffic_sign
+from layout import WayLayout
+from diagnostics import Diagnostics
+
+# classes of tag=value pairs, see Way.classify_tag()
+TAG_RECOGNIZED = 0
+TAG_IGNORED = 1
+TAG_UNRECOGNIZED_VALUE = 2
+TAG_UNRECOGNIZED_IGNORED_VALUE = 3
+TAG_UNRECOGNIZED = 4
+
+# kinds of warnings about the tags of a way, see Way.__init__() and Way.filter_tags()
+TAG_WARNING_KINDS = ["unrecognized_value", "unrecognized_ignored_value", "unrecognized_tag", "unrecognized_highway", "missing_highway"]
+
+
+def compile_tag_classes(recognized: typing.Dict[str, typing.Set[str]],
+                        recognized_any_value: typing.List[str],
+                        ignored: typing.Dict[str, typing.Set[str]]) -> typing.Tuple[typing.Dict[typing.Tuple[str, str], int], typing.Dict[str, int]]:
+    """ compile the tag tables into a class by tag=value pair and a class by tag for all other values """
+    pair_classes = {}
+    for tag, values in ignored.items():
+        for value in values:
+            pair_classes[(tag, value)] = TAG_IGNORED
+    for tag, values in recognized.items():
+        for value in values:
+            pair_classes[(tag, value)] = TAG_RECOGNIZED
+
+    tag_classes = {}
+    for tag in ignored:
+        tag_classes[tag] = TAG_UNRECOGNIZED_IGNORED_VALUE
+    for tag in recognized_any_value:
+        tag_classes[tag] = TAG_RECOGNIZED
+    for tag in recognized:
+        tag_classes[tag] = TAG_UNRECOGNIZED_IGNORED_VALUE if tag in ignored else TAG_UNRECOGNIZED_VALUE
+    return pair_classes, tag_classes
 
 
 class Way:
@@ -58,6 +91,9 @@ class Way:
         "traffic_sign":                {"none"}
     }
 
+    # compiled once from the tables above, see classify_tag()
+    pair_classes, tag_classes = compile_tag_classes(recognized_tags, recognized_tags_any_value, ignored_tags)
+
     def __init__(self: 'Way', name: str, tags: tagging.Tag_group, count: int, total: int) -> 'Way':
         self.way_elems: typing.List[WayElement] = []
         self.name: str = name
@@ -65,28 +101,22 @@ class Way:
         self.count: int = count
         self.total: int = total
         self.traffic_signs: typing.List = list()
+        self.layout: typing.Optional[WayLayout] = None
+        self.layout_pixel_pro_meter: typing.Optional[float] = None
 
         self.filter_tags()
 
         #print('generating elements for way "' + self.name + '" which has', len(self.tags), "tags")
         if "highway" in self.tags:
-            if self.tags["highway"] in self.recognized_tags["highway"]:
+            create_elements = self.highway_builders.get(self.tags["highway"])
+            if create_elements is not None:
                 self.add_grass_verge_left()
-                if self.tags["highway"] == "road":
-                    self.create_elements_highway_road()
-                elif self.tags["highway"] == "footway":
-                    self.create_elements_highway_footway()
-                elif self.tags["highway"] == "cycleway":
-                    self.create_elements_highway_cycleway()
-                elif self.tags["highway"] == "path":
-                    self.create_elements_highway_path()
+                create_elements(self)
                 self.add_grass_verge_right()
             else:  # unknown highway value
-                print('warning: unrecognized tag "highway"=' + '"' + self.tags["highway"] + '"', "found!")
-                #pprint(self.tags, indent=5, compact=False, sort_dicts=False, width=1)
+                Diagnostics.warn("unrecognized_highway", 'warning: unrecognized tag "highway"="' + self.tags["highway"] + '" found!')
         else:  # no highway tag
-            print("no highway tag found!")
-            pprint(self.tags, indent=9, compact=False, sort_dicts=False, width=1)
+            Diagnostics.warn("missing_highway", "warning: no highway tag found! " + str(dict(self.tags)))
 
         if "traffic_sign" in self.filtered_tags:
             sign_values = self.filtered_tags["traffic_sign"].split(";")
@@ -103,26 +133,29 @@ class Way:
     def filter_tags(self: 'Way') -> None:
         self.filtered_tags = {}
         for tag, value in self.tags.items():
-            if tag in self.recognized_tags:
-                if value in self.recognized_tags[tag]:
-                    self.filtered_tags[tag] = value
-                else:
-                    if tag not in self.ignored_tags:
-                        print('warning: unrecognized value found for tag "'+tag+'"="'+value+'"')
-                    elif value not in self.ignored_tags[tag]:
-                        print('warning: unrecognized value found for ignored tag "'+tag+'"="'+value+'"')
-            elif tag in self.recognized_tags_any_value:
+            tag_class = Way.classify_tag(tag, value)
+            if tag_class == TAG_RECOGNIZED:
                 self.filtered_tags[tag] = value
-            elif tag in self.ignored_tags:
-                if value not in self.ignored_tags[tag]:
-                    print('warning: unrecognized value found for ignored tag "'+tag+'"="'+value+'"')
-            else:
-                print('warning: unrecognized tag "'+tag+'"="'+value+'"', "found!")
+            elif tag_class == TAG_UNRECOGNIZED_VALUE:
+                Diagnostics.warn("unrecognized_value", 'warning: unrecognized value found for tag "'+tag+'"="'+value+'"')
+            elif tag_class == TAG_UNRECOGNIZED_IGNORED_VALUE:
+                Diagnostics.warn("unrecognized_ignored_value", 'warning: unrecognized value found for ignored tag "'+tag+'"="'+value+'"')
+            elif tag_class == TAG_UNRECOGNIZED:
+                Diagnostics.warn("unrecognized_tag", 'warning: unrecognized tag "'+tag+'"="'+value+'" found!')
+
+    @staticmethod
+    def classify_tag(tag: str, value: str) -> int:
+        """ class of a tag=value pair, one of the TAG_* constants """
+        tag_class = Way.pair_classes.get((tag, value))
+        if tag_class is None:
+            return Way.tag_classes.get(tag, TAG_UNRECOGNIZED)
+        return tag_class
 
     def make_grass_verge_elem(self: 'Way') -> WayElement:
-        return WayElement(settings.Draw()["gruenstreifen"]["breite"]["max"],
-                          settings.Draw()["draw_height_meter"],
-                          settings.Draw()["gruenstreifen"]["colour"])
+        draw_settings = settings.Draw.compiled()
+        return WayElement(draw_settings.gruenstreifen.breite.max,
+                          draw_settings.draw_height_meter,
+                          draw_settings.gruenstreifen.colour)
 
     def add_grass_verge_left(self: 'Way') -> None:
         # add grass_verge if first way
@@ -146,41 +179,45 @@ class Way:
         self.filtered_tags.setdefault("lanes", "2")
         self.filtered_tags.setdefault("divider", "dashed_line")
 
+        draw_settings = settings.Draw.compiled()
+        strasse = draw_settings.strasse
+        linie = strasse.linie
+
         # seitenlinie, beide seiten, linie, abstand zu bordstein
-        lane_markings_width = settings.Draw()["strasse"]["linie"][settings.Draw()["strasse"]["linie"]["seitenlinie"]["breite"]] * 2 * 2
+        lane_markings_width = linie.seitenlinie.breite * 2 * 2
         if self.filtered_tags["divider"] != "no":
             # leitlinie, mittig
-            lane_markings_width += settings.Draw()["strasse"]["linie"][settings.Draw()["strasse"]["linie"]["leitlinie"]["breite"]]
+            lane_markings_width += linie.leitlinie.breite
 
         # platz zwischen bordstein und seitenlinie
-        bordstein_line_sep = WayElement(settings.Draw()["strasse"]["linie"][settings.Draw()["strasse"]["linie"]["seitenlinie"]["breite"]]*2,
-                                        settings.Draw()["draw_height_meter"],
-                                        settings.Draw()["strasse"]["colour"])
-        seitenlinie = WayElement(settings.Draw()["strasse"]["linie"][settings.Draw()["strasse"]["linie"]["seitenlinie"]["breite"]],
-                                 settings.Draw()["draw_height_meter"],
-                                 settings.Draw()["strasse"]["linie"]["colour"])
+        bordstein_line_sep = WayElement(linie.seitenlinie.breite*2,
+                                        draw_settings.draw_height_meter,
+                                        strasse.colour)
+        seitenlinie = WayElement(linie.seitenlinie.breite,
+                                 draw_settings.draw_height_meter,
+                                 linie.colour)
 
         # if wanted, create leitlinie
-        if self.filtered_tags["divider"] != "no":
-            leitlinie = WayElement(settings.Draw()["strasse"]["linie"][settings.Draw()["strasse"]["linie"]["leitlinie"]["breite"]],
-                                   settings.Draw()["strasse"]["linie"]["leitlinie"]["laenge"],
-                                   settings.Draw()["strasse"]["linie"]["colour"])
-            if self.filtered_tags["divider"] == "dashed_line":
-                leitlinie.set_distance(settings.Draw()["strasse"]["linie"]["leitlinie"]["abstand"],
-                                       settings.Draw()["strasse"]["colour"])
-                leitlinie._height = settings.Draw()["strasse"]["linie"]["leitlinie"]["laenge"]
-            elif self.filtered_tags["divider"] == "solid_line":
-                # do not set distance
-                leitlinie._height = settings.Draw()["draw_height_meter"]
-
-        highway_lane = WayElement(settings.Draw()["strasse"]["spurbreite"],
-                                  settings.Draw()["draw_height_meter"],
-                                  settings.Draw()["strasse"]["colour"])
-        bordstein = WayElement(settings.Draw()["strasse"]["bordstein"]["breite"],
-                               settings.Draw()["strasse"]["bordstein"]["laenge"],
-                               settings.Draw()["strasse"]["bordstein"]["colour"])
-        bordstein.set_distance(settings.Draw()["strasse"]["bordstein"]["abstand"],
-                               settings.Draw()["strasse"]["bordstein"]["background_colour"])
+        if self.filtered_tags["divider"] == "dashed_line":
+            leitlinie = WayElement(linie.leitlinie.breite,
+                                   linie.leitlinie.laenge,
+                                   linie.colour,
+                                   linie.leitlinie.abstand,
+                                   strasse.colour)
+        elif self.filtered_tags["divider"] == "solid_line":
+            # no distance
+            leitlinie = WayElement(linie.leitlinie.breite,
+                                   draw_settings.draw_height_meter,
+                                   linie.colour)
+
+        highway_lane = WayElement(strasse.spurbreite,
+                                  draw_settings.draw_height_meter,
+                                  strasse.colour)
+        bordstein = WayElement(strasse.bordstein.breite,
+                               strasse.bordstein.laenge,
+                               strasse.bordstein.colour,
+                               strasse.bordstein.abstand,
+                               strasse.bordstein.background_colour)
 
         self.way_elems.append(bordstein)
         self.way_elems.append(bordstein_line_sep)
@@ -200,54 +237,56 @@ class Way:
             if ("cycleway:right:lane" in self.filtered_tags
                 and
                     self.filtered_tags["cycleway:right:lane"] == "exclusive"):
-                linie_links = WayElement(settings.Draw()["strasse"]["linie"][settings.Draw()["cycleway"]["ausgeschildert"]["radfahrstreifen"]["seitenlinie"]["links"]["breite"]],
-                                         settings.Draw()["cycleway"]["ausgeschildert"]["radfahrstreifen"]["seitenlinie"]["links"]["laenge"],
-                                         settings.Draw()["strasse"]["linie"]["colour"])
-                linie_links.set_distance(settings.Draw()["cycleway"]["ausgeschildert"]["radfahrstreifen"]["seitenlinie"]["links"]["abstand"],
-                                         settings.Draw()["strasse"]["colour"])
+                radfahrstreifen = draw_settings.cycleway.ausgeschildert.radfahrstreifen
+                linie_links = WayElement(radfahrstreifen.seitenlinie.links.breite,
+                                         radfahrstreifen.seitenlinie.links.laenge,
+                                         linie.colour,
+                                         radfahrstreifen.seitenlinie.links.abstand,
+                                         strasse.colour)
                 self.way_elems.append(linie_links)
 
                 linie_abstand = WayElement(0.05,
-                                           settings.Draw()["draw_height_meter"],
-                                           settings.Draw()["strasse"]["colour"])
+                                           draw_settings.draw_height_meter,
+                                           strasse.colour)
 
                 self.way_elems.append(linie_abstand)
-                self.way_elems.append(WayElement(settings.Draw()["cycleway"]["ausgeschildert"]["radfahrstreifen"]["breite"]["min"],
-                                                 settings.Draw()["draw_height_meter"],
-                                                 settings.Draw()["cycleway"]["ausgeschildert"]["radfahrstreifen"]["colour"]))
+                self.way_elems.append(WayElement(radfahrstreifen.breite.min,
+                                                 draw_settings.draw_height_meter,
+                                                 radfahrstreifen.colour))
                 self.way_elems.append(linie_abstand)
 
-                linie_rechts = WayElement(settings.Draw()["strasse"]["linie"][settings.Draw()["cycleway"]["ausgeschildert"]["radfahrstreifen"]["seitenlinie"]["rechts"]["breite"]],
-                                          settings.Draw()["cycleway"]["ausgeschildert"]["radfahrstreifen"]["seitenlinie"]["rechts"]["laenge"],
-                                          settings.Draw()["strasse"]["linie"]["colour"])
-                linie_rechts.set_distance(settings.Draw()["cycleway"]["ausgeschildert"]["radfahrstreifen"]["seitenlinie"]["rechts"]["abstand"],
-                                          settings.Draw()["strasse"]["colour"])
+                linie_rechts = WayElement(radfahrstreifen.seitenlinie.rechts.breite,
+                                          radfahrstreifen.seitenlinie.rechts.laenge,
+                                          linie.colour,
+                                          radfahrstreifen.seitenlinie.rechts.abstand,
+                                          strasse.colour)
                 self.way_elems.append(linie_rechts)
             elif ("cycleway:right:lane" in self.filtered_tags
                   and
                   self.filtered_tags["cycleway:right:lane"] == "advisory"):
-                linie_links = WayElement(settings.Draw()["strasse"]["linie"][settings.Draw()["cycleway"]["schutzstreifen"]["seitenlinie"]["links"]["breite"]],
-                                         settings.Draw()["cycleway"]["schutzstreifen"]["seitenlinie"]["links"]["laenge"],
-                                         settings.Draw()["strasse"]["linie"]["colour"])
-                linie_links.set_distance(settings.Draw()["cycleway"]["schutzstreifen"]["seitenlinie"]["links"]["abstand"],
-                                         settings.Draw()["strasse"]["colour"])
+                schutzstreifen = draw_settings.cycleway.schutzstreifen
+                linie_links = WayElement(schutzstreifen.seitenlinie.links.breite,
+                                         schutzstreifen.seitenlinie.links.laenge,
+                                         linie.colour,
+                                         schutzstreifen.seitenlinie.links.abstand,
+                                         strasse.colour)
                 self.way_elems.append(linie_links)
 
                 linie_abstand = WayElement(0.05,
-                                           settings.Draw()["draw_height_meter"],
-                                           settings.Draw()["strasse"]["colour"])
+                                           draw_settings.draw_height_meter,
+                                           strasse.colour)
 
                 self.way_elems.append(linie_abstand)
-                self.way_elems.append(WayElement(settings.Draw()["cycleway"]["schutzstreifen"]["breite"]["min"],
-                                                 settings.Draw()["draw_height_meter"],
-                                                 settings.Draw()["strasse"]["colour"]))
+                self.way_elems.append(WayElement(schutzstreifen.breite.min,
+                                                 draw_settings.draw_height_meter,
+                                                 strasse.colour))
                 self.way_elems.append(linie_abstand)
 
-                linie_rechts = WayElement(settings.Draw()["strasse"]["linie"][settings.Draw()["cycleway"]["schutzstreifen"]["seitenlinie"]["rechts"]["breite"]],
-                                          settings.Draw()["cycleway"]["schutzstreifen"]["seitenlinie"]["rechts"]["laenge"],
-                                          settings.Draw()["strasse"]["linie"]["colour"])
-                linie_rechts.set_distance(settings.Draw()["cycleway"]["schutzstreifen"]["seitenlinie"]["rechts"]["abstand"],
-                                          settings.Draw()["strasse"]["colour"])
+                linie_rechts = WayElement(schutzstreifen.seitenlinie.rechts.breite,
+                                          schutzstreifen.seitenlinie.rechts.laenge,
+                                          linie.colour,
+                                          schutzstreifen.seitenlinie.rechts.abstand,
+                                          strasse.colour)
                 self.way_elems.append(linie_rechts)
             self.way_elems.append(bordstein_line_sep)
         else:
@@ -257,9 +296,10 @@ class Way:
         self.way_elems.append(bordstein)
 
     def create_elements_highway_footway(self: 'Way') -> None:
-        highway_footway = WayElement(settings.Draw()["gehweg"]["breite"]["min"],
-                                     settings.Draw()["draw_height_meter"],
-                                     settings.Draw()["gehweg"]["colour"])
+        draw_settings = settings.Draw.compiled()
+        highway_footway = WayElement(draw_settings.gehweg.breite.min,
+                                     draw_settings.draw_height_meter,
+                                     draw_settings.gehweg.colour)
         grass_verge = self.make_grass_verge_elem()
 
         # TODO traffic_sign="*"
@@ -268,9 +308,10 @@ class Way:
         self.way_elems.append(highway_footway)
 
     def create_elements_highway_cycleway(self: 'Way') -> None:
-        highway_cycleway = WayElement(settings.Draw()["cycleway"]["ausgeschildert"]["hochbord"]["breite"]["opt"],
-                                      settings.Draw()["draw_height_meter"],
-                                      settings.Draw()["cycleway"]["colour"])
+        draw_settings = settings.Draw.compiled()
+        highway_cycleway = WayElement(draw_settings.cycleway.ausgeschildert.hochbord.breite.opt,
+                                      draw_settings.draw_height_meter,
+                                      draw_settings.cycleway.colour)
         gruenstreifen = self.make_grass_verge_elem()
 
         # TODO traffic_sign="*"
@@ -279,31 +320,44 @@ class Way:
 
     def create_elements_highway_path(self: 'Way') -> None:
         self.filtered_tags.setdefault("segregated", "no")
+        draw_settings = settings.Draw.compiled()
         if self.filtered_tags["segregated"] == "yes":
-            cycleway = WayElement(settings.Draw()["cycleway"]["hochbord"]["breite"]["min"],
-                                  settings.Draw()["draw_height_meter"],
-                                  settings.Draw()["cycleway"]["colour"])
+            cycleway = WayElement(draw_settings.cycleway.hochbord.breite.min,
+                                  draw_settings.draw_height_meter,
+                                  draw_settings.cycleway.colour)
             self.way_elems.append(cycleway)
-            highway_path = WayElement(settings.Draw()["weg"]["breite"]["min"],
-                                      settings.Draw()["draw_height_meter"],
-                                      settings.Draw()["weg"]["colour"])
+            highway_path = WayElement(draw_settings.weg.breite.min,
+                                      draw_settings.draw_height_meter,
+                                      draw_settings.weg.colour)
         else:
-            highway_path = WayElement(settings.Draw()["weg"]["breite"]["min"],
-                                      settings.Draw()["draw_height_meter"],
-                                      settings.Draw()["weg"]["colour"])
+            highway_path = WayElement(draw_settings.weg.breite.min,
+                                      draw_settings.draw_height_meter,
+                                      draw_settings.weg.colour)
         self.way_elems.append(highway_path)
 
+    # element builders by highway value, must match recognized_tags["highway"]
+    highway_builders = {
+        "road":                        create_elements_highway_road,
+        "footway":                     create_elements_highway_footway,
+        "cycleway":                    create_elements_highway_cycleway,
+        "path":                        create_elements_highway_path,
+    }
+
     def add_traffic_sign(self: 'Way', sign_name: str, side_weight=1/2) -> None:
         if sign_name.startswith("DE:"):
             sign_name = sign_name[3:]
         self.traffic_signs.append(traffic_sign.TrafficSign(sign_name, side_weight))
 
+    def get_layout(self: 'Way') -> WayLayout:
+        """ pixel geometry of all elements, computed on first use per pixel_pro_meter """
+        pixel_pro_meter = settings.Draw.compiled().pixel_pro_meter
+        if self.layout is None or self.layout_pixel_pro_meter != pixel_pro_meter:
+            self.layout = WayLayout(self.way_elems)
+            self.layout_pixel_pro_meter = pixel_pro_meter
+        return self.layout
+
     def get_width(self: 'Way') -> float:
-        width = 0
-        elem: WayElement
-        for elem in self.way_elems:
-            width += elem.get_width()
-        return width
+        return self.get_layout().width
 
     def get_elements(self: 'Way') -> typing.Generator[WayElement, None, None]:
         for elem in self.way_elems:
@@ -311,3 +365,4 @@ class Way:
 
     def add_rect(self: 'Way', width, height, colour="grey"):
         self.way_elems.insert(WayElement(width, height, colour))
+        self.layout = None
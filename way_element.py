@@ -1,46 +1,59 @@
+import typing
 from math import floor
 import settings
+from diagnostics import Diagnostics
 
 
 class WayElement:
+    """ immutable element of a way, equal elements are shared, see interned """
+    __slots__ = ("_width", "_height", "_distance", "colour", "background_colour")
+
     _width: float
     _height: float
     _distance: float
     colour: str
     background_colour: str
 
-    def __init__(self: 'WayElement', width, height, colour="grey"):
-        self._width = width
-        self._height = height
-        self._distance = None
-        self.colour = colour
-        self.background_colour = None
+    # static class member, one instance per (width, height, distance, colour, background_colour)
+    interned: typing.Dict[typing.Tuple, 'WayElement'] = {}
+
+    def __new__(cls, width, height, colour="grey", distance=None, background_colour: typing.Optional[str] = None) -> 'WayElement':
+        if width == "?":
+            width = 1
+        elif not isinstance(width, (int, float)):
+            Diagnostics.warn("not_a_number", "error: _width is not number: " + str(type(width)) + " " + str(width))
+
+        if height == "?" and distance is None:
+            distance = 1
+        elif not isinstance(height, (int, float)):
+            Diagnostics.warn("not_a_number", "error: _height is not number: " + str(type(height)) + " " + str(height))
 
-        if self._width == "?":
-            self._width = 1
-        elif not isinstance(self._width, (int, float)):
-            print("error: _width is not number:", type(self._width), self._width)
+        if distance == "?":
+            distance = 1
+        elif distance is not None and not isinstance(distance, (int, float)):
+            Diagnostics.warn("not_a_number", "error: _distance is not number: " + str(type(distance)) + " " + str(distance))
 
-        if self._height == "?":
-            self._distance = 1
-        elif not isinstance(self._height, (int, float)):
-            print("error: _height is not number:", type(self._height), self._height)
+        key = (width, height, distance, colour, background_colour)
+        elem = WayElement.interned.get(key)
+        if elem is None:
+            elem = object.__new__(cls)
+            for name, value in zip(WayElement.__slots__, key):
+                object.__setattr__(elem, name, value)
+            WayElement.interned[key] = elem
+        return elem
 
-        if self._distance == "?":
-            self._distance = 1
-        elif self._distance is not None and not isinstance(self._distance, (int, float)):
-            print("error: _distance is not number:", type(self._distance), self._distance)
+    def __setattr__(self: 'WayElement', name: str, value) -> None:
+        raise AttributeError("WayElement is immutable, create a new one instead")
 
-    def set_distance(self: 'WayElement', distance, background_colour: str) -> None:
-        self._distance = distance
-        self.background_colour = background_colour
+    def __reduce__(self: 'WayElement'):
+        return (WayElement, (self._width, self._height, self.colour, self._distance, self.background_colour))
 
     def __str__(self: 'WayElement') -> str:
-        return "Way_Element: " + str(self.__dict__)
+        return "Way_Element: " + str({name: getattr(self, name) for name in WayElement.__slots__})
 
     def convert_meter_to_pixel(self: 'WayElement', val):
         # floor to avoid floating point inaccuracies and weird subpixel gaps in the rendered svg
-        return floor(val * settings.Draw()["pixel_pro_meter"])
+        return floor(val * settings.Draw.compiled().pixel_pro_meter)
 
     def get_width(self: 'WayElement') -> float:
         return self.convert_meter_to_pixel(self._width)